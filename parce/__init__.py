@@ -94,13 +94,14 @@ class Document(treedocument.TreeDocumentMixin, document.Document):
             builder = treebuilder.BackgroundTreeBuilder(root_lexicon)
         else:
             builder.root.clear()
-            builder.root.lexicon = root_lexicon
+            from .lexicon import resolve_lexicon
+            builder.root.lexicon = resolve_lexicon(root_lexicon)
         treedocument.TreeDocumentMixin.__init__(self, builder)
         if text:
             builder.rebuild(text)
 
 
-def find(name=None, *, filename=None, mimetype=None, contents=None):
+def find(name=None, *, filename=None, mimetype=None, contents=None, lazy=False):
     """Find a root lexicon, either by language name, or by filename, mimetype
     and/or contents.
 
@@ -129,6 +130,10 @@ def find(name=None, *, filename=None, mimetype=None, contents=None):
     finds all bundled languages. See the module's documentation to find out how
     to add your own languages to a registry.
 
+    If ``lazy`` is True, the language module is not imported until the
+    lexicon is used for parsing; a :class:`~parce.lexicon.LazyLexicon` is
+    returned.
+
     """
     from . import registry
     if name:
@@ -139,7 +144,7 @@ def find(name=None, *, filename=None, mimetype=None, contents=None):
         else:
             return
     if lexicon_name:
-        return registry.root_lexicon(lexicon_name)
+        return registry.root_lexicon(lexicon_name, lazy)
 
 
 def root(root_lexicon, text):
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Run the same query over many files or texts, in parallel.
+
+A :class:`Search` parses every source and runs a query on the tree, using a
+:class:`concurrent.futures.Executor`. By default, a
+:class:`~concurrent.futures.ProcessPoolExecutor` is used, so the sources are
+parsed and queried in separate processes. The trees stay in the worker
+processes, only the matching nodes are sent back, as :class:`Match` tuples::
+
+    from parce.corpus import search
+
+    def imgs(q):
+        return q.all.action(Name.Tag)("img")
+
+    for m in search(imgs, glob.glob("**/*.html", recursive=True)):
+        print(m.file, m.pos, m.text)
+
+The query is a function that builds a query chain, like for
+:func:`~parce.query.compile_query`. When using a ProcessPoolExecutor, the
+function must be picklable, so it must be defined at module level, not as a
+lambda.
+
+The matches of one source are yielded in document order, but the sources are
+yielded in the order they are finished. Stop iterating or call
+:meth:`Search.cancel` to cancel the pending jobs.
+
+"""
+
+import collections
+import concurrent.futures
+import itertools
+import os
+import threading
+
+import parce
+import parce.standardaction
+from parce.query import compile_query
+
+
+class Match(collections.namedtuple("Match", "file pos end action text")):
+    """A named tuple(file, pos, end, action, text) describing a query result.
+
+    ``file`` is the filename or the name of the text source. For a Context,
+    ``action`` and ``text`` are None.
+
+    """
+    __slots__ = ()
+
+
+class Search:
+    """Parse and query a number of sources, using an Executor.
+
+    ``query`` is a function that is called with a Query and builds the query
+    chain, e.g. ``lambda q: q.all.action(Comment)``.
+
+    ``sources`` is an iterable of filenames and/or tuples(name, text). Files
+    are read in the worker, using the ``encoding``.
+
+    ``root_lexicon`` is used to parse all the sources. If None, the root
+    lexicon is chosen for every source using the :mod:`~parce.registry`,
+    based on the filename and the contents. Sources for which no language is
+    found are skipped.
+
+    If ``limit`` is given, yields no more than that number of matches (none if
+    ``limit`` is 0).
+
+    ``executor`` is a :class:`concurrent.futures.Executor`; if not given, a
+    :class:`~concurrent.futures.ProcessPoolExecutor` is created and shut down
+    when the search ends. ``jobs`` is the number of sources that is submitted
+    to the executor in advance, by default twice the number of CPUs.
+
+    Iterate over the Search to perform the search and get the
+    :class:`Match` tuples. Exceptions raised in a job (e.g. when a file can't
+    be read) are raised when the results of that source are due.
+
+    """
+    def __init__(self, query, sources, root_lexicon=None, *,
+                 limit=None, executor=None, jobs=None, encoding="utf-8"):
+        self.query = query
+        self.sources = sources
+        self.root_lexicon = root_lexicon
+        self.limit = limit
+        self.executor = executor
+        self.jobs = jobs or 2 * (os.cpu_count() or 1)
+        self.encoding = encoding
+        self._cancelled = threading.Event()
+
+    def __iter__(self):
+        limit = self.limit
+        if limit is not None and limit <= 0:
+            return
+        executor = self.executor or concurrent.futures.ProcessPoolExecutor()
+        lexicon = self.root_lexicon
+        if lexicon:
+            # send the lexicon in a picklable form
+            lexicon = lexicon.language, lexicon.name, lexicon.arg
+        sources = iter(self.sources)
+        pending = set()
+        actions = {}
+        try:
+            while True:
+                while not self._cancelled.is_set() and len(pending) < self.jobs:
+                    for source in sources:
+                        pending.add(executor.submit(_search,
+                            source, lexicon, self.query, limit, self.encoding))
+                        break
+                    else:
+                        break
+                if not pending:
+                    return
+                done, pending = concurrent.futures.wait(pending,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                if self._cancelled.is_set():
+                    return
+                for future in done:
+                    for file, pos, end, action, text in future.result():
+                        if self._cancelled.is_set():
+                            return
+                        if action is not None:
+                            action = _action(action, actions)
+                        yield Match(file, pos, end, action, text)
+                        if limit is not None:
+                            limit -= 1
+                            if not limit:
+                                return
+        finally:
+            for future in pending:
+                future.cancel()
+            if not self.executor:
+                executor.shutdown(wait=False)
+
+    def cancel(self):
+        """Cancel the search.
+
+        Can be called from another thread; the iteration stops as soon as
+        a running job has finished, and the pending jobs are cancelled.
+
+        """
+        self._cancelled.set()
+
+    def cancelled(self):
+        """Return True if the search was cancelled."""
+        return self._cancelled.is_set()
+
+
+def search(query, sources, root_lexicon=None, **kwargs):
+    """Convenience function returning a :class:`Search`.
+
+    Iterate over the result to get the :class:`Match` tuples. See
+    :class:`Search` for the arguments.
+
+    """
+    return Search(query, sources, root_lexicon, **kwargs)
+
+
+def _search(source, lexicon, query, limit, encoding):
+    """Parse and query one source in a worker.
+
+    Returns a list of tuples(file, pos, end, action, text). Actions are
+    encoded using :func:`~parce.standardaction.encode_action`.
+
+    """
+    if isinstance(source, tuple):
+        filename, text = source
+    else:
+        filename = source
+        with open(source, encoding=encoding) as f:
+            text = f.read()
+    if lexicon:
+        language, name, arg = lexicon
+        root_lexicon = getattr(language, name)
+        if arg is not None:
+            root_lexicon = root_lexicon(arg)
+    else:
+        root_lexicon = parce.find(
+            filename=os.path.basename(os.fspath(filename)), contents=text)
+        if not root_lexicon:
+            return []
+    tree = parce.root(root_lexicon, text)
+    results = []
+    for n in itertools.islice(compile_query(query)(tree), limit):
+        if n.is_token:
+            action = parce.standardaction.encode_action(n.action)
+            results.append((filename, n.pos, n.end, action, n.text))
+        else:
+            results.append((filename, n.pos, n.end, None, None))
+    return results
+
+
+def _action(name, actions):
+    """Return the action for the name returned by :func:`_search`.
+
+    Looked up actions are cached in the ``actions`` dictionary.
+
+    """
+    try:
+        return actions[name]
+    except KeyError:
+        a = actions[name] = parce.standardaction.decode_action(name)
+        return a
@@ -68,11 +68,14 @@ Example::
 
 import collections
 import functools
+import hashlib
 import os
+import pickle
 import re
 import reprlib
+import threading
 
-from . import util
+from . import pkginfo, util
 from .lang.css import Css, Atrule, Rule, Value
 from .transform import transform_text
 
@@ -124,6 +127,7 @@ class StyleSheet:
         self.rules = rules or []
         self.filename = filename
         self._imported_filenames = []
+        self._specificities = {}    # caches the specificity of rules
 
     def __repr__(self):
         fnames = ', '.join(map(os.path.basename, self.filenames()))
@@ -149,8 +153,13 @@ class StyleSheet:
 
     @classmethod
     def load_from_file(cls, filename):
-        """Return a CSS structure from filename, handling the encoding."""
-        return cls.load_from_data(open(filename, 'rb').read())
+        """Return a CSS structure from filename, handling the encoding.
+
+        The structure is cached in the :data:`file_cache`, so a file is only
+        parsed again when it has changed.
+
+        """
+        return file_cache.get(filename, cls.load_from_data)
 
     @classmethod
     def from_file(cls, filename, path=None, allow_import=True):
@@ -313,8 +322,15 @@ class StyleSheet:
                     yield from get_rules(r.style.rules)
                 elif isinstance(r, Rule):
                     yield r
-        rules = sorted(get_rules(self.rules),
-            key=lambda rule: calculate_specificity(rule.prelude))
+        specificities = self._specificities
+        def specificity(rule):
+            try:
+                return specificities[id(rule)][1]
+            except KeyError:
+                s = calculate_specificity(rule.prelude)
+                specificities[id(rule)] = (rule, s)   # keep rule (and id) alive
+                return s
+        rules = sorted(get_rules(self.rules), key=specificity)
         rules.reverse()
         return Style(rules)
 
@@ -350,10 +366,128 @@ class Style:
     def __repr__(self):
         return '<{} ({} rules)>'.format(self.__class__.__name__, len(self.rules))
 
+    @util.cached_property
+    def _index(self):
+        """A four-tuple(ids, classes, names, other) indexing our rules.
+
+        Each rule is put in a bucket according to the rightmost compound
+        selector of each selector in its prelude: by id, or else by the first
+        class, or else by element name. The ``ids``, ``classes`` and ``names``
+        dictionaries map those to a list of rule indices; ``other`` lists the
+        indices of rules that can't be indexed, e.g. ``*`` or ``:hover``.
+
+        """
+        ids, classes, names, other = {}, {}, {}, []
+        for i, rule in enumerate(self.rules):
+            for selectors in rule.prelude:
+                if not selectors:
+                    continue
+                sel = selectors[-1]
+                if sel.get('id_selector'):
+                    bucket = ids.setdefault(sel['id_selector'][0], [])
+                elif sel.get('class_selector'):
+                    bucket = classes.setdefault(sel['class_selector'][0], [])
+                elif sel.get('element_selector'):
+                    bucket = names.setdefault(sel['element_selector'][0], [])
+                else:
+                    bucket = other
+                if not bucket or bucket[-1] != i:
+                    bucket.append(i)
+        return ids, classes, names, other
+
+    def _candidate_indices(self, element):
+        """Return the sorted list of indices of rules that could match."""
+        ids, classes, names, other = self._index
+        indices = set(other)
+        indices.update(ids.get(element.get_id(), ()))
+        for c in element.get_classes():
+            indices.update(classes.get(c, ()))
+        indices.update(names.get(element.get_name(), ()))
+        return sorted(indices)
+
+    def candidates(self, element):
+        """Return the list of rules that could match with the Element.
+
+        Only the rules in the index buckets for the element's id, classes and
+        name are returned (and the rules that could not be indexed), in their
+        original order.
+
+        """
+        rules = self.rules
+        return [rules[i] for i in self._candidate_indices(element)]
+
+    @util.cached_property
+    def _ancestor_masks(self):
+        """For every rule, a list with a bloom filter mask for every selector.
+
+        The mask has the bits set for the ids, classes and names of all
+        compound selectors that must match an ancestor of the element, i.e.
+        that are followed by a descendant or child combinator.
+
+        """
+        result = []
+        for rule in self.rules:
+            masks = []
+            for selectors in rule.prelude:
+                keys = []
+                for sel, operator in zip(selectors[::2], selectors[1::2]):
+                    if operator in (" ", ">"):
+                        keys.extend(_selector_keys(sel))
+                masks.append(_bloom_mask(keys))
+            result.append(masks)
+        return result
+
+    def select_tree(self, element):
+        """Yield (element, Style) tuples for the element and all descendants.
+
+        The tree is traversed once in document order, and the Style contains
+        the rules that match that element, like :meth:`select_element` would
+        return. This is much faster than calling :meth:`select_element` for
+        every element: a bloom filter of the ids, classes and names of the
+        ancestors of each element is used to reject rules with descendant or
+        child selectors quickly, and the parent and sibling elements are
+        cached during the traversal.
+
+        """
+        rules = self.rules
+        masks = self._ancestor_masks
+        stack = [(element, None, 0, (element,), 0)]
+        while stack:
+            e, parent, index, siblings, ancestors = stack.pop()
+            node = _TreeElement(e, parent, index, siblings)
+            selected = [rules[i] for i in self._candidate_indices(node)
+                if any(not m & ~ancestors for m in masks[i])
+                    and node.match(rules[i].prelude)]
+            yield e, type(self)(selected)
+            children = list(e.children())
+            if children:
+                ancestors |= _bloom_mask(node.keys())
+                stack.extend((child, node, i, children, ancestors)
+                    for i, child in reversed(list(enumerate(children))))
+
+    def select_tree_properties(self, element):
+        """Return a dictionary mapping every element in the tree to its properties.
+
+        The tree is traversed using :meth:`select_tree`, and the properties are
+        the dictionaries returned by :meth:`properties`.
+
+        """
+        return {e: style.properties() for e, style in self.select_tree(element)}
+
+    def select_lxml_tree_properties(self, element):
+        """Return a dictionary mapping every lxml.etree.Element to its properties.
+
+        The lxml element and all its descendants are styled using
+        :meth:`select_tree`.
+
+        """
+        return {e.e: style.properties()
+            for e, style in self.select_tree(LxmlElement(element))}
+
     @style_query
     def select_element(self, element):
         """Select the rules that match with Element."""
-        for rule in self.rules:
+        for rule in self.candidates(element):
             if element.match(rule.prelude):
                 yield rule
 
@@ -667,6 +801,8 @@ class Element(AbstractElement, list):
     def __ne__(self, other):
         return self is not other
 
+    __hash__ = object.__hash__
+
     def get_name(self):
         """Implemented to return the element's name."""
         return self.name
@@ -754,6 +890,169 @@ class LxmlElement(AbstractElement):
             yield type(self)(n)
 
 
+class _TreeElement(AbstractElement):
+    """Wraps an element during :meth:`Style.select_tree`.
+
+    Caches the parent, the siblings and the classes, so walking up the tree
+    and along the siblings is cheap.
+
+    """
+    def __init__(self, element, parent, index, siblings):
+        self.element = element
+        self.parent = parent
+        self.index = index
+        self.siblings = siblings
+        self.classes = element.get_classes()
+        self.id = element.get_id()
+        self.name = element.get_name()
+
+    def __eq__(self, other):
+        if isinstance(other, _TreeElement):
+            other = other.element
+        return self.element == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def keys(self):
+        """Return the keys to store in the ancestor bloom filter."""
+        keys = ['.' + c for c in self.classes]
+        if self.id:
+            keys.append('#' + self.id)
+        keys.append(self.name)
+        return keys
+
+    def _pseudo_class(self, name):
+        """Delegate pseudo classes to the wrapped element."""
+        return self.element._pseudo_class(name)
+
+    def get_name(self):
+        return self.name
+
+    def get_parent(self):
+        return self.parent
+
+    def get_attributes(self):
+        return self.element.get_attributes()
+
+    def get_pseudo_classes(self):
+        return self.element.get_pseudo_classes()
+
+    def get_pseudo_elements(self):
+        return self.element.get_pseudo_elements()
+
+    def children(self):
+        return self.element.children()
+
+    def get_child_count(self):
+        return self.element.get_child_count()
+
+    def previous_siblings(self):
+        return reversed(self.siblings[:self.index])
+
+    def next_siblings(self):
+        return iter(self.siblings[self.index+1:])
+
+    def get_classes(self):
+        return self.classes
+
+    def get_id(self):
+        return self.id
+
+
+def _selector_keys(selector):
+    """Return the keys of a compound selector to look up in a bloom filter."""
+    keys = ['.' + c for c in selector.get('class_selector', ())]
+    keys.extend('#' + i for i in selector.get('id_selector', ()))
+    keys.extend(selector.get('element_selector', ()))
+    return keys
+
+
+def _bloom_mask(keys):
+    """Return an integer bloom filter mask with two bits set for every key."""
+    mask = 0
+    for key in keys:
+        h = hash(key)
+        mask |= 1 << (h & 255) | 1 << (h >> 8 & 255)
+    return mask
+
+
+class FileCache:
+    """Caches the CSS structures parsed from files.
+
+    In memory, the structures are stored by file name, and reused as long as
+    the modification time and size of the file do not change. If the
+    ``directory`` attribute is set, the structures are also pickled in that
+    directory, stored under a hash of the file's contents, so another process
+    does not need to parse an unchanged file again. Imported files are cached
+    separately, in the same way.
+
+    If you watch CSS files for changes, e.g. when editing a theme, call
+    :meth:`invalidate` when a file changes, to be sure it is parsed again.
+
+    """
+    directory = None    #: if set, the directory to store parsed files in
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files = {}
+
+    def get(self, filename, load):
+        """Return the CSS structure for the file, calling ``load(data)`` if needed."""
+        filename = os.path.abspath(filename)
+        stat = os.stat(filename)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            try:
+                k, css = self._files[filename]
+            except KeyError:
+                pass
+            else:
+                if k == key:
+                    return css
+        with open(filename, 'rb') as f:
+            data = f.read()
+        css = cache_file = None
+        if self.directory:
+            h = hashlib.sha1(data)
+            h.update(pkginfo.version_string.encode())
+            cache_file = os.path.join(self.directory, h.hexdigest() + ".pickle")
+            try:
+                with open(cache_file, 'rb') as f:
+                    css = pickle.load(f)
+            except Exception:
+                pass    # not yet cached, or unreadable
+        if css is None:
+            css = load(data)
+            if cache_file:
+                try:
+                    os.makedirs(self.directory, exist_ok=True)
+                    with open(cache_file, 'wb') as f:
+                        pickle.dump(css, f, pickle.HIGHEST_PROTOCOL)
+                except OSError:
+                    pass
+        with self._lock:
+            self._files[filename] = key, css
+        return css
+
+    def invalidate(self, filename=None):
+        """Forget the cached structure of the file, or of all files if None.
+
+        Files pickled in the ``directory`` are stored under a hash of their
+        contents, so a changed file never uses an outdated structure.
+
+        """
+        with self._lock:
+            if filename is None:
+                self._files.clear()
+            else:
+                self._files.pop(os.path.abspath(filename), None)
+
+
+#: The global FileCache used by :meth:`StyleSheet.load_from_file`.
+file_cache = FileCache()
+
+
 def calculate_specificity(prelude):
     """Calculate the specificity of the Css rule prelude.
 
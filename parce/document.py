@@ -95,6 +95,7 @@ class AbstractDocument:
         self._edit_context = 0
         self._revision = 0
         self._changes = []
+        self._changed_ranges = []
 
     def text(self):
         """Should return the text."""
@@ -190,39 +191,69 @@ class AbstractDocument:
         """Apply the changes and update the positions of the cursors."""
         if self._changes:
             self._changes.sort()
-            # check for overlaps, find the region
+            # check for overlaps, find the region and the disjoint ranges
             head = old = self._changes[0][0]
             added = 0
+            ranges = []
             for start, end, text in self._changes:
                 if start < old:
                     raise RuntimeError("overlapping changes: {}".format(self._changes))
+                pos = head + added + start - old    # position in the new text
+                if ranges and ranges[-1][0] + ranges[-1][2] == pos:
+                    # touches the previous range, merge
+                    p, r, a = ranges[-1]
+                    ranges[-1] = (p, r + end - start, a + len(text))
+                else:
+                    ranges.append((pos, end - start, len(text)))
                 added += start - old + len(text)
                 old = end
+            self._changed_ranges = ranges
             self._update_cursors()
             self._update_contents()
             self._changes.clear()
             self._revision += 1
-            self.contents_changed(head, end - head, added)
+            self.ranges_changed(ranges)
 
     def _update_cursors(self):
-        """Update the positions of the cursors."""
-        i = 0
-        cursors = sorted(self._cursors, key = lambda c: c.pos)
-        for start, end, text in self._changes:
-            for c in cursors[i:]:
-                ahead = c.pos > start
-                if ahead:
-                    if end >= c.pos:
-                        c.pos = start
-                    else:
-                        c.pos += start + len(text) - end
-                if c.end is not None and c.end >= start:
-                    if end >= c.end:
-                        c.end = start + len(text)
-                    else:
-                        c.end += start + len(text) - end
-                elif not ahead:
-                    i += 1  # don't consider this cursor any more
+        """Update the positions of the cursors.
+
+        The cursors and the (sorted) changes are traversed in a single sweep,
+        so this is fast, even with many cursors and many changes.
+
+        """
+        cursors = list(self._cursors)
+        if not cursors:
+            return
+        changes = self._changes
+        z = len(changes)
+
+        # update the pos attributes
+        cursors.sort(key = lambda c: c.pos)
+        i = delta = 0
+        for c in cursors:
+            while i < z and changes[i][1] < c.pos:
+                start, end, text = changes[i]
+                delta += start + len(text) - end
+                i += 1
+            if i < z and changes[i][0] < c.pos:
+                c.pos = changes[i][0] + delta   # pos was in removed text
+            else:
+                c.pos += delta
+
+        # update the end attributes
+        cursors = sorted((c for c in cursors if c.end is not None),
+                         key = lambda c: c.end)
+        i = delta = 0
+        for c in cursors:
+            while i < z and changes[i][1] < c.end:
+                start, end, text = changes[i]
+                delta += start + len(text) - end
+                i += 1
+            if i < z and changes[i][0] <= c.end:
+                start, end, text = changes[i]
+                c.end = start + len(text) + delta   # end moves with new text
+            else:
+                c.end += delta
 
     def _update_contents(self):
         """Should apply the changes (in self._changes) to the text."""
@@ -281,6 +312,35 @@ class AbstractDocument:
                 if not block or block.pos >= end:
                     break
 
+    def changed_ranges(self):
+        """Return the list of disjoint ranges that were altered by the last change.
+
+        Every range is a (position, removed, added) three-tuple. The positions
+        refer to the new text; when the changes would be applied one after
+        another, every position also refers to the text as modified by the
+        previous ranges. Ranges that touch each other are merged.
+
+        """
+        return self._changed_ranges
+
+    def bulk_replace(self, changes):
+        """Apply many changes in one go.
+
+        The ``changes`` is an iterable of (start, end, text) tuples, which
+        refer to the current state of the text, and may not overlap. This is
+        much faster than setting all the slices one by one, because the
+        changes are not validated one by one; they are applied as one change
+        set with a single update of the cursors.
+
+        If you are in an edit context, the changes are added to the pending
+        changes, otherwise they are applied immediately. Afterwards,
+        :meth:`changed_ranges` reports the ranges that were actually changed.
+
+        """
+        self._changes.extend(changes)
+        if not self._edit_context:
+            self._apply_changes()
+
     def replace(self, old, new, start=0, end=None, count=0):
         """Replace occurrences of old with new in region start->end.
 
@@ -288,18 +348,18 @@ class AbstractDocument:
         replaced.
 
         """
-        if old == new:
+        if old == new or not old:
             return
         text = self[start:end]
         length = len(old)
-        with self:
-            pos = text.find(old)
-            while pos >= 0:
-                self[start+pos:start+pos+length] = new
-                pos = text.find(old, pos + 1)
-                count -= 1
-                if count == 0:
-                    break
+        changes = []
+        pos = text.find(old)
+        while pos >= 0:
+            changes.append((start + pos, start + pos + length, new))
+            if len(changes) == count:
+                break
+            pos = text.find(old, pos + length)
+        self.bulk_replace(changes)
 
     def re_sub(self, pattern, replacement, start=0, end=None, count=0, flags=0):
         """Replace regular expression matches of pattern with replacement.
@@ -315,11 +375,14 @@ class AbstractDocument:
         text = self[start:end]
         if not callable(replacement):
             replacement = (lambda repl: lambda m: m.expand(repl))(replacement)
-        with self:
-            for i, m in enumerate(re.finditer(pattern, text, flags), 1):
-                self[m.start():m.end()] = replacement(m)
-                if i == count:
-                    break
+        changes = []
+        for i, m in enumerate(re.finditer(pattern, text, flags), 1):
+            new = replacement(m)
+            if new != m.group():
+                changes.append((start + m.start(), start + m.end(), new))
+            if i == count:
+                break
+        self.bulk_replace(changes)
 
     def trim(self, start=0, end=None):
         """Remove trialing whitespace in the specified region."""
@@ -338,8 +401,22 @@ class AbstractDocument:
         repl = lambda m: mapping[m.group()]
         self.re_sub(expr, repl, start, end, count)
 
+    def ranges_changed(self, ranges):
+        """Called by ``_apply_changes()`` with the list of disjoint ranges.
+
+        Every range is a (position, removed, added) tuple, see
+        :meth:`changed_ranges`. The default implementation calls
+        :meth:`contents_changed` with the region encompassing all ranges.
+
+        """
+        position = ranges[0][0]
+        pos, removed, added = ranges[-1]
+        added = pos + added - position
+        removed = added - sum(a - r for p, r, a in ranges)
+        self.contents_changed(position, removed, added)
+
     def contents_changed(self, position, removed, added):
-        """Called by _apply(). The default implementation does nothing."""
+        """Called by :meth:`ranges_changed`. The default implementation does nothing."""
         pass
 
 
@@ -353,9 +430,13 @@ class Document(AbstractDocument, util.Observable):
     It also inherits from :class:`~parce.util.Observable` and emits the
     following events:
 
+    ``"ranges_change" (ranges)``:
+        emitted with the list of disjoint (position, removed, added) ranges
+        whenever the text changes, see :meth:`changed_ranges`
+
     ``"contents_change" (position, removed, added)``:
         emitted with ``position``, ``removed``, ``added`` arguments whenever the
-        text changes
+        text changes, denoting the region encompassing all changed ranges
 
     ``"contents_changed"``:
         emitted directly afther the previous event, but without arguments
@@ -484,6 +565,11 @@ class Document(AbstractDocument, util.Observable):
         """Return True if redo is possible."""
         return bool(self._redo_stack)
 
+    def ranges_changed(self, ranges):
+        """Reimplemented to emit the ``"ranges_change"`` event."""
+        self.emit("ranges_change", ranges)
+        super().ranges_changed(ranges)
+
     def contents_changed(self, position, removed, added):
         """Called by ``_apply_changes()``.
 
@@ -102,6 +102,57 @@ format you want to create.
 """
 
 
+class ActionTable(list):
+    """A lookup table mapping standard actions to text formats.
+
+    The table is a list indexed by the ``_id`` of a
+    :class:`~parce.standardaction.StandardAction`; the format is computed by
+    calling ``func(action)``. Actions that are not yet resolved are resolved
+    when the table is called with the action; :meth:`compile` resolves many
+    actions beforehand, so that looking up formats while formatting is just
+    indexing a list.
+
+    An ActionTable can be used as the ``textformat`` callable of a
+    :class:`FormatCache`.
+
+    """
+    unresolved = object()   #: the value of actions that are not yet resolved
+
+    def __init__(self, func):
+        super().__init__()
+        self._func = func
+        self._lock = threading.Lock()
+
+    def __call__(self, action):
+        """Return the text format for the action, resolving it if needed."""
+        try:
+            f = self[action._id]
+        except IndexError:
+            pass
+        except AttributeError:
+            return self._func(action)   # not a StandardAction
+        else:
+            if f is not self.unresolved:
+                return f
+        return self._resolve(action)
+
+    def _resolve(self, action):
+        """Compute the format for the action and store it."""
+        i = action._id
+        with self._lock:
+            if i >= len(self):
+                self.extend(self.unresolved for _ in range(len(self), i + 1))
+            f = self[i]
+            if f is self.unresolved:
+                f = self[i] = self._func(action)
+            return f
+
+    def compile(self, actions):
+        """Resolve all the specified actions beforehand."""
+        for action in actions:
+            self(action)
+
+
 class AbstractFormatter:
     """A Formatter formats text based on the action of tokens."""
 
@@ -159,6 +210,24 @@ class AbstractFormatter:
         """
         raise NotImplementedError
 
+    def compile(self, *languages):
+        """Resolve the formats for all standard actions of the languages.
+
+        The standard actions the languages and the languages they refer to can
+        yield, are looked up in the theme that is used for that language, so
+        that :meth:`format_ranges` does not need to compute them. This only
+        has effect for format caches that use an :class:`ActionTable`. Other
+        actions are resolved on first use, as before.
+
+        """
+        from parce.introspect import all_languages, standardactions
+        caches = self.format_caches()
+        default = caches.get(None)
+        for lang in all_languages(*languages):
+            fc = caches.get(lang, default)
+            if fc is not None and isinstance(fc.textformat, ActionTable):
+                fc.textformat.compile(standardactions(lang))
+
     def format_ranges(self, tree, start=0, end=None, format_context=None):
         """Yield FormatRange(pos, end, format) three-tuples.
 
@@ -172,6 +241,17 @@ class AbstractFormatter:
         cache = format_caches.get              # quick access
         fc = default_fcache = cache(None)      # the default FormatCache
 
+        tables = {}
+        def get_table(fc):
+            """Return the ActionTable for the FormatCache."""
+            table = fc.textformat
+            if not isinstance(table, ActionTable):
+                try:
+                    table = tables[table]
+                except KeyError:
+                    table = tables[table] = ActionTable(table)
+            return table
+
         if fc is None:
             # there is no default theme, don't yield tokens and use empty fc
             fc = FormatCache(None, None, lambda action: None,
@@ -186,43 +266,51 @@ class AbstractFormatter:
         else:
             # language can potentially switch, follow it
             def tokens():
-                nonlocal fc
+                nonlocal fc, table
                 curlang = None
 
                 # Modifies curlang and current format cache fc if lang changes
                 def check_lang(lang):
-                    nonlocal curlang, fc
+                    nonlocal curlang, fc, table
                     if lang is not curlang:
                         curlang = lang
                         nfc = cache(lang, default_fcache)
                         if nfc is not fc:
                             fc = nfc
+                            table = get_table(fc)
                             if format_context:
                                 format_context.switch(fc)
 
                 for context, slice_ in tree.context_slices(start, end):
                     check_lang(context.lexicon.language)
-                    n = context[slice_]
+                    n = context
+                    i, z, _ = slice_.indices(len(n))
                     stack = []
-                    i = 0
                     while True:
-                        for i in range(i, len(n)):
+                        for i in range(i, z):
                             m = n[i]
                             if m.is_context:
-                                stack.append(i)
+                                stack.append((i, z))
                                 i = 0
+                                z = len(m)
                                 n = m
                                 check_lang(n.lexicon.language)
                                 break
-                            yield m
+                            if end is not None and m.pos >= end:
+                                return
+                            if m.end > start:
+                                yield m
                         else:
                             if stack:
                                 n = n.parent
                                 check_lang(n.lexicon.language)
-                                i = stack.pop() + 1
+                                i, z = stack.pop()
+                                i += 1
                             else:
                                 break
 
+        table = get_table(fc)
+
         if fc.unparsed is not None:
             # Yield the unparsed format between tokens
             def stream():
@@ -233,7 +321,7 @@ class AbstractFormatter:
                     if t.pos > prev_end:
                         yield prev_end, t.pos, unparsed
                     prev_end = t.end
-                    f = fc.textformat(t.action)
+                    f = table(t.action)
                     if f is None:
                         f = fc.base
                     if f is not None:
@@ -246,7 +334,7 @@ class AbstractFormatter:
                 nonlocal fc
                 prev_end = start
                 for t in tokens():
-                    f = fc.textformat(t.action)
+                    f = table(t.action)
                     if f is not None:
                         if fc.base is not None and t.pos > prev_end:
                             yield prev_end, t.pos, fc.base
@@ -380,14 +468,12 @@ class Formatter(AbstractFormatter):
         if add_baseformat:
             base_ = theme.baseformat()
             base = self._factory(base_)
-            @util.cached_func
-            def factory(action):
-                return self._factory(base_ + theme.textformat(action))
+            factory = ActionTable(lambda action:
+                self._factory(base_ + theme.textformat(action)))
         else:
             base = None
-            @util.cached_func
-            def factory(action):
-                return self._factory(theme.textformat(action))
+            factory = ActionTable(lambda action:
+                self._factory(theme.textformat(action)))
 
         @util.cached_func
         def baseformat(role, state):
@@ -445,9 +531,15 @@ class SimpleFormatter(AbstractFormatter):
         an action to a css class string.
 
         """
-        from parce.theme import css_class
-        baseformat = lambda role, state: None
-        return {None: FormatCache(None, None, css_class, baseformat, None)}
+        try:
+            return self._format_caches
+        except AttributeError:
+            from parce.theme import css_class
+            baseformat = lambda role, state: None
+            textformat = ActionTable(css_class)
+            self._format_caches = caches = \
+                {None: FormatCache(None, None, textformat, baseformat, None)}
+            return caches
 
 
 class FormatContext:
@@ -470,3 +562,162 @@ class FormatContext:
         """Called when formatting has finished."""
 
 
+class FormatRangeCache:
+    """Caches the FormatRanges a formatter yields for the tree of a TreeBuilder.
+
+    This is useful when (parts of) a document are formatted often, e.g. when
+    repainting the visible part of an editor. The ranges are computed and
+    stored in chunks of about ``chunk_size`` characters, ending at a token.
+    When the TreeBuilder emits the ``"updated"`` event, only the chunks in the
+    updated region are discarded, and the chunks after it are moved. So
+    :meth:`format_ranges` only needs to format the damaged regions again.
+
+    The ``hits`` and ``misses`` attributes count the number of chunks that
+    were served from the cache or that needed to be formatted, respectively.
+
+    If you change the themes of the formatter, call :meth:`clear`.
+
+    For example::
+
+        >>> from parce import Document, find, theme_by_name
+        >>> from parce.formatter import Formatter, FormatRangeCache
+        >>> d = Document(find("css"), "h1 { color: red; }")
+        >>> c = FormatRangeCache(Formatter(theme_by_name()), d.builder())
+        >>> r = list(c.format_ranges(0, 10))
+        >>> c.hits, c.misses
+        (0, 1)
+        >>> r = list(c.format_ranges(0, 10))
+        >>> c.hits, c.misses
+        (1, 1)
+
+    """
+    chunk_size = 4096   #: the number of characters to format and cache at once
+
+    def __init__(self, formatter, builder):
+        self._formatter = formatter
+        self._builder = builder
+        self._lock = threading.Lock()
+        self._chunks = []   # sorted [pos, end, ranges] lists, ranges relative to pos
+        self._tree_end = builder.root.end
+        self.hits = 0       #: the number of chunks that were served from the cache
+        self.misses = 0     #: the number of chunks that were formatted
+        builder.connect("updated", self.update)
+
+    def formatter(self):
+        """Return the formatter."""
+        return self._formatter
+
+    def builder(self):
+        """Return the TreeBuilder."""
+        return self._builder
+
+    def clear(self):
+        """Clear the cache. The hit and miss counters are not reset."""
+        with self._lock:
+            self._chunks.clear()
+            self._tree_end = self._builder.root.end
+
+    def update(self, start, end):
+        """Invalidate the region from ``start`` to ``end``.
+
+        This method is called when the TreeBuilder emits the ``"updated"``
+        event. The chunks overlapping the region are discarded, and the
+        chunks after the region are moved according to the change in length
+        of the tree.
+
+        """
+        with self._lock:
+            tree_end = self._builder.root.end
+            offset = tree_end - self._tree_end
+            self._tree_end = tree_end
+            # the end of the region before the change, None means everything
+            old_end = end - offset if end < tree_end else None
+            chunks = []
+            for c in self._chunks:
+                if c[1] <= start:
+                    chunks.append(c)
+                elif old_end is not None and c[0] >= old_end:
+                    c[0] += offset
+                    c[1] += offset
+                    chunks.append(c)
+            self._chunks = chunks
+
+    def format_ranges(self, start=0, end=None):
+        """Yield FormatRange(pos, end, format) three-tuples.
+
+        The result is the same as calling the formatter's
+        :meth:`~AbstractFormatter.format_ranges` method with the TreeBuilder's
+        tree, but the formatted ranges are taken from the cache if possible.
+
+        """
+        tree = self._builder.get_root(True)
+        stop = tree.end if end is None else min(end, tree.end)
+        tail = None
+        if end is not None and end > start:
+            # the format of the text between the last token and the end
+            # depends on that token, it is not cached; format it including
+            # that token, which determines the theme
+            last = tree.find_token_left(end - 1)
+            if not last or last.end < end:
+                tail = max(start, last.end) if last else start
+                stop = min(stop, tail)
+        def stream():
+            for pos, ranges in self._get_chunks(tree, start, stop):
+                for p, e, f in ranges:
+                    p += pos
+                    e += pos
+                    if e > start and p < stop:
+                        yield p, e, f
+            if tail is not None:
+                for p, e, f in self._formatter.format_ranges(
+                        tree, last.pos if last else tail, end):
+                    if e > tail:
+                        yield max(p, tail), e, f
+        yield from util.merge_adjacent(util.fix_boundaries(
+                                          stream(), start, end), FormatRange)
+
+    def _get_chunks(self, tree, start, end):
+        """Return a list of (pos, ranges) tuples for the region start-end.
+
+        Chunks that are not yet cached are formatted and stored.
+
+        """
+        result = []
+        with self._lock:
+            chunks = self._chunks
+            # find the first chunk that ends after start
+            i = 0
+            hi = len(chunks)
+            while i < hi:
+                mid = (i + hi) // 2
+                if chunks[mid][1] <= start:
+                    i = mid + 1
+                else:
+                    hi = mid
+            pos = start
+            while pos < end:
+                if i < len(chunks) and chunks[i][0] <= pos:
+                    self.hits += 1
+                else:
+                    # format a new chunk, roughly aligned to the start of the
+                    # gap; chunks start and end at the end of a token, as the
+                    # format of the text between tokens depends on the next
+                    # token, and we don't want to fill it at the chunk end
+                    gap_start = chunks[i-1][1] if i else 0
+                    gap_end = chunks[i][0] if i < len(chunks) else self._tree_end
+                    size = self.chunk_size
+                    cpos = gap_start + (pos - gap_start) // size * size
+                    t = tree.find_token_before(cpos)
+                    cpos = max(gap_start, t.end if t else 0)
+                    t = tree.find_token(max(cpos + size, pos + 1) - 1)
+                    cend = min(t.end, gap_end) if t else gap_end
+                    ranges = [(r.pos - cpos, r.end - cpos, r.textformat)
+                        for r in self._formatter.format_ranges(tree, cpos, cend)]
+                    chunks.insert(i, [cpos, cend, ranges])
+                    self.misses += 1
+                c = chunks[i]
+                result.append((c[0], c[2]))
+                pos = c[1]
+                i += 1
+        return result
+
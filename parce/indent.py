@@ -82,9 +82,11 @@ The following events can be yielded (simply module constants):
 
 """
 
+import bisect
 import collections
 import sys
 import threading
+import weakref
 
 # events w/o args
 INDENT          = 1
@@ -150,26 +152,44 @@ class AbstractIndenter:
     #: whether to also indent blank lines
     indent_blank_lines = True
 
+    def __init__(self):
+        self._states = weakref.WeakKeyDictionary()  # document: indent states
+
     def indent(self, cursor):
         """Indent all the lines in the cursor's range.
 
-        This method scans the document always from the beginning, although it
-        doesn't change lines before the start of the cursor's range. To
-        re-indent a full document, select all text in the cursor (i.e. ``pos``
-        is 0, ``end`` is None).
+        This method scans the document from the beginning, although it doesn't
+        change lines before the start of the cursor's range. To re-indent a
+        full document, select all text in the cursor (i.e. ``pos`` is 0,
+        ``end`` is None).
 
-        """
-        prev_info = None
-        indents = ['']
+        The indenting state at the start of every scanned block is cached, so
+        that a later call can start scanning at the last cached block before
+        the cursor's range. After a document change, only the states after the
+        changed position are discarded.
 
+        """
         with cursor.document() as d:
-            for block in d.blocks():
-                info = self.indent_info(block, indents)
+            positions, states = self._indent_states(d)
+            i = bisect.bisect_right(positions, cursor.pos) - 1
+            if i < 0:
+                start, indents, prev_indents = 0, [''], ()
+            else:
+                start = positions[i]
+                indents, prev_indents = states[i]
+                indents = list(indents)
+
+            for block, tokens in self.block_tokens(d, start):
+                if not positions or block.pos > positions[-1]:
+                    positions.append(block.pos)
+                    states.append((tuple(indents), prev_indents))
+
+                info = self.indent_info(block, indents, tokens)
 
                 # handle indents in previous line
-                if prev_info and prev_info.indents:
+                if prev_indents:
                     current_indent = indents[-1]
-                    for indent in prev_info.indents:
+                    for indent in prev_indents:
                         indents.append(current_indent + (indent or self.indent_string))
 
                 # dedents at start of current line
@@ -198,7 +218,39 @@ class AbstractIndenter:
                 if cursor.end is not None and block.end >= cursor.end:
                     break
 
-                prev_info = info
+                prev_indents = tuple(info.indents)
+
+    def _indent_states(self, document):
+        """Return the cached indent states for the document.
+
+        Returns two lists: the positions of the blocks, from the first block
+        on, and the state at the start of each block: a tuple(indents,
+        prev_indents). If the document was changed since the states were
+        cached, the states after the start of the change are discarded.
+
+        """
+        key = self._state_key(document)
+        revision = document.revision()
+        try:
+            old_revision, old_key, positions, states = self._states[document]
+        except KeyError:
+            old_revision = old_key = None
+        if old_key != key or old_revision not in (revision, revision - 1):
+            positions, states = [], []
+        elif old_revision != revision:
+            # the document changed; states up to the change are still valid
+            i = bisect.bisect_right(positions, document.changed_ranges()[0][0])
+            del positions[i:], states[i:]
+        self._states[document] = (revision, key, positions, states)
+        return positions, states
+
+    def _state_key(self, document):
+        """Return a value that changes when cached indent states become invalid."""
+        return self.indent_string, self.indent_blank_lines
+
+    def clear_cache(self):
+        """Discard the cached indent states of all documents."""
+        self._states.clear()
 
     def auto_indent(self, cursor):
         """Adjust the indent of the single block at the Cursor's pos."""
@@ -234,8 +286,8 @@ class AbstractIndenter:
     def increase_indent(self, cursor):
         """Increase the indent in the Cursor's lines."""
         with cursor.document() as d:
-            for b in cursor.blocks():
-                info = self.indent_info(b)
+            for b, tokens in self.block_tokens(d, cursor.pos, cursor.end):
+                info = self.indent_info(b, (), tokens)
                 if info.allow_indent:
                     d.insert(b.pos, self.indent_string)
 
@@ -243,8 +295,8 @@ class AbstractIndenter:
         """Decrease the indent in the Cursor's lines."""
         # TODO: 'd be nice to make it smarter and search backwards for indents.
         with cursor.document() as d:
-            for b in cursor.blocks():
-                info = self.indent_info(b)
+            for b, tokens in self.block_tokens(d, cursor.pos, cursor.end):
+                info = self.indent_info(b, (), tokens)
                 if info.allow_indent and info.indent:
                     if info.indent.startswith(self.indent_string):
                         remove = self.indent_string
@@ -260,21 +312,28 @@ class AbstractIndenter:
 
         """
         with cursor.document() as d:
-            for b in cursor.blocks():
-                info = self.indent_info(b)
+            for b, tokens in self.block_tokens(d, cursor.pos, cursor.end):
+                info = self.indent_info(b, (), tokens)
                 if info.allow_strip:
                     new_text = b.text().rstrip(chars)
                     if len(new_text) != len(b):
                         del d[b.pos+len(new_text):b.end]
 
-    def indent_info(self, block, prev_indents=()):
-        """Return an IndentInfo object for the specified block."""
+    def indent_info(self, block, prev_indents=(), tokens=None):
+        """Return an IndentInfo object for the specified block.
+
+        If given, ``tokens`` is the tuple of tokens in the block, as yielded by
+        :meth:`block_tokens`, and passed on to :meth:`indent_events`.
+
+        """
 
         info = IndentInfo(block)
 
         find_dedents = True
 
-        for event in self.indent_events(block, prev_indents):
+        events = self.indent_events(block, prev_indents) if tokens is None \
+            else self.indent_events(block, prev_indents, tokens)
+        for event in events:
             if isinstance(event, tuple):
                 event, arg = event[:2]
                 if event is CURRENT_INDENT:
@@ -313,6 +372,16 @@ class AbstractIndenter:
         return
         yield
 
+    def block_tokens(self, document, start=0, end=None):
+        """Yield (block, tokens) tuples for the blocks from start to end.
+
+        The default implementation yields None for the tokens, so
+        :meth:`indent_events` does not get them.
+
+        """
+        for block in document.blocks(start, end):
+            yield block, None
+
 
 class Indenter(AbstractIndenter):
     """Indenter that uses Language-specific indenters if available.
@@ -322,12 +391,18 @@ class Indenter(AbstractIndenter):
 
     """
     def __init__(self):
+        super().__init__()
         self._lock = threading.Lock()   # for instantiating Indents
         self._indents = {}
 
-    def indent_events(self, block, prev_indents=()):
-        """Reimplemented to use Indent subclasses for the specified language."""
-        tokens = block.tokens()
+    def indent_events(self, block, prev_indents=(), tokens=None):
+        """Reimplemented to use Indent subclasses for the specified language.
+
+        If ``tokens`` is None, the tokens are looked up in the document's tree.
+
+        """
+        if tokens is None:
+            tokens = block.tokens()
         if tokens:
             curlang = tokens[0].parent.lexicon.language
             i = 0
@@ -345,6 +420,27 @@ class Indenter(AbstractIndenter):
                 yield from indenter.indent_events(
                     block, tokens[i:], i == 0, prev_indents)
 
+    def block_tokens(self, document, start=0, end=None):
+        """Reimplemented to yield the tokens of each block.
+
+        The tokens of the document's tree are traversed only once, alongside
+        the blocks, instead of searching the tree for every block.
+
+        """
+        tokens = None
+        pending = collections.deque()   # tokens that may overlap the next blocks
+        for block in document.blocks(start, end):
+            if tokens is None:
+                tokens = document.get_root(True).tokens_range(block.pos)
+                token = next(tokens, None)
+            while pending and pending[0].end <= block.pos:
+                pending.popleft()
+            while token and token.pos < block.end:
+                if token.end > block.pos:
+                    pending.append(token)
+                token = next(tokens, None)
+            yield block, tuple(t for t in pending if t.pos < block.end)
+
     def get_indent(self, language):
         """Return a Indent class instance for the specified language."""
         try:
@@ -360,6 +456,11 @@ class Indenter(AbstractIndenter):
     def add_indent(self, language, indent):
         """Add a Indent instance for the specified language."""
         self._indents[language] = indent
+        self.clear_cache()
+
+    def _state_key(self, document):
+        """Reimplemented to also invalidate the states when the root lexicon changes."""
+        return super()._state_key(document) + (document.root_lexicon(),)
 
     def find_indent(self, language):
         """If no Indent was added, try to find a predefined one.
@@ -44,11 +44,18 @@ def decision_tree(lexicon, build=False):
 
 
 def lexicons(lang):
-    """Return a list of all the lexicons on the language."""
+    """Return a list of all the lexicons on the language.
+
+    Lexicons the language inherits from a base language are also returned.
+
+    """
     lexicons = []
-    for key, value in lang.__dict__.items():
-        if isinstance(value, LexiconDescriptor):
-            lexicons.append(getattr(lang, key))
+    names = set()
+    for cls in lang.__mro__:
+        for key, value in cls.__dict__.items():
+            if isinstance(value, LexiconDescriptor) and key not in names:
+                names.add(key)
+                lexicons.append(getattr(lang, key))
     return lexicons
 
 
@@ -87,4 +94,17 @@ def languages(lang):
             if isinstance(i, Lexicon) and i.language is not lang)
 
 
+def all_languages(*langs):
+    """Return the set of the specified languages and all languages they refer to.
 
+    Unlike :func:`languages`, this function also follows the targets from the
+    languages that are referred to.
+
+    """
+    result = set()
+    todo = set(langs)
+    while todo:
+        lang = todo.pop()
+        result.add(lang)
+        todo.update(languages(lang) - result)
+    return result
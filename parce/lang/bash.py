@@ -41,7 +41,7 @@ RE_BRACE = (
     r'(\{)'     # brace {
     r'(?:'
         r'(?:\w\.\.\w|\d+\.\.\d+)(?:\.\.\d+)?'   # sequence expr
-        r'''|[^|&;()<>\s"'`!{}]*(?:,[^|&;()<>\s"'`!{}]*)+'''  # comma-separated strings
+        r'''|[^|&;()<>\s"'`!{},]*(?:,[^|&;()<>\s"'`!{},]*)+'''  # comma-separated strings
     r')'       # expand expr
     r'(\})'     # brace }
     r'''([^|&;()<>\s"'`!{}]*)'''   # postscript
@@ -59,7 +59,7 @@ class Language(metaclass=_LanguageType):
         languages use this method for their comment lexicons.
 
         """
-        yield r'\b\w+(?:[._%+-]\w+)*@\w+(?:[._-]\w+)*\b', Comment.Email
+        yield r'\b\w+(?:[.%+-]\w+)*@\w+(?:[.-]\w+)*\b', Comment.Email
         yield r'(?:(?:https?|ftp):/|\bwww\.)(?:[\w_~:/#-]+([.?=][\w_~:/#-]+)*|\([\w._~:?/#-]*\))+', Comment.Url
         yield r"\b(ALERT|BUG|FIXME|TEMP|TODO|XXX+)\b", Comment.Alert
         yield parce.default_action, Comment
@@ -89,6 +89,7 @@ And here's how the same text would translate to a tree structure::
 
 import collections
 
+from .lexicon import resolve_lexicon
 from .ruleitem import ActionItem, Item, unroll
 from .target import TargetFactory, Target
 
@@ -109,7 +110,7 @@ class Lexer:
     """
     def __init__(self, lexicons):
         """Lexicons should be an iterable of one or more lexicons."""
-        self.lexicons = list(lexicons)
+        self.lexicons = [resolve_lexicon(l) for l in lexicons]
 
     def events(self, text, pos=0):
         """Get the events from parsing text from the specified position."""
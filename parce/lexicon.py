@@ -441,6 +441,79 @@ class Lexicon:
         return parse
 
 
+class LazyLexicon:
+    """Stands in for a Lexicon without importing the module that defines it.
+
+    The ``qualname`` is the fully qualified name of the lexicon, like
+    ``"parce.lang.css.Css.root"``. The ``name``, ``fullname`` and
+    ``qualname`` attributes are available right away; the module is imported
+    when the Lexicon itself is needed, using
+    :func:`~parce.registry.root_lexicon`.
+
+    A LazyLexicon can be used as root lexicon in a
+    :class:`~parce.treebuilder.TreeBuilder`, :class:`~parce.lexer.Lexer` or
+    :class:`~parce.Document`, those use the real Lexicon. Other attributes
+    are taken from the real Lexicon. To compare a tree's lexicon with a
+    LazyLexicon, use :meth:`lexicon`.
+
+    """
+    __slots__ = ('qualname', 'fullname', 'name', '_lexicon')
+
+    def __init__(self, qualname):
+        self.qualname = qualname
+        module, cls, name = qualname.rsplit('.', 2)
+        self.fullname = cls + '.' + name
+        self.name = name
+        self._lexicon = None
+
+    def lexicon(self):
+        """Import the module if needed and return the Lexicon."""
+        lexicon = self._lexicon
+        if lexicon is None:
+            from . import registry
+            lexicon = self._lexicon = registry.root_lexicon(self.qualname)
+        return lexicon
+
+    def is_loaded(self):
+        """Return True if the Lexicon was already imported."""
+        return self._lexicon is not None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            # e.g. an unset slot after copying, don't import the module
+            raise AttributeError(name)
+        return getattr(self.lexicon(), name)
+
+    def __reduce__(self):
+        return LazyLexicon, (self.qualname,)
+
+    def __call__(self, arg=None):
+        return self.lexicon()(arg)
+
+    def __eq__(self, other):
+        return resolve_lexicon(other) == self.lexicon()
+
+    def __ne__(self, other):
+        return resolve_lexicon(other) != self.lexicon()
+
+    def __hash__(self):
+        return hash(self.lexicon())
+
+    def __repr__(self):
+        return self.fullname
+
+
+def resolve_lexicon(lexicon):
+    """Return the Lexicon if ``lexicon`` is a :class:`LazyLexicon`.
+
+    Otherwise, ``lexicon`` is returned unchanged.
+
+    """
+    if type(lexicon) is LazyLexicon:
+        return lexicon.lexicon()
+    return lexicon
+
+
 def lexicon(rules_func=None, **kwargs):
     """Lexicon factory decorator.
 
@@ -53,6 +53,8 @@ Usage example::
 
 """
 
+import io
+
 import parce.formatter
 
 FULL_HTML_TEMPLATE = """<!DOCTYPE html>
@@ -71,7 +73,62 @@ FULL_HTML_TEMPLATE = """<!DOCTYPE html>
 
 
 class HtmlMixin:
-    """Helper class containing extra methods to generate HTML output."""
+    """Helper class containing extra methods to generate HTML output.
+
+    A class using this mixin should define the ``span`` attribute, a format
+    string that wraps a format and the escaped text in a HTML element.
+
+    """
+    span = '<span>{1}</span>'
+
+    def html(self, cursor):
+        """Return HTML output for the selected range of the cursor."""
+        return "".join(self.iter_html(cursor))
+
+    def iter_html(self, cursor, line_numbers=False, anchor=None):
+        """Yield HTML output for the selected range of the cursor in pieces.
+
+        If ``line_numbers`` is True, every line starts with its line number in
+        a ``<span class="lineno">`` element. If ``anchor`` is given, every
+        line starts with an empty ``<a>`` element with an ``id`` attribute
+        consisting of the anchor, a hyphen and the line number, e.g.
+        ``"line-12"``, so that you can link to every line.
+
+        """
+        span = self.span.format
+        pieces = self.format_document(cursor)
+        if not line_numbers and not anchor:
+            for text, fmt in pieces:
+                yield span(attrescape(fmt), escape(text)) if fmt else escape(text)
+            return
+
+        doc_text = cursor.document().text()
+        end = len(doc_text) if cursor.end is None else cursor.end
+        lineno = doc_text.count('\n', 0, cursor.pos) + 1
+        width = len(str(lineno + doc_text.count('\n', cursor.pos, end)))
+        if anchor:
+            anchor = attrescape(anchor)
+
+        def prefix():
+            p = ""
+            if anchor:
+                p += '<a id="{}-{}"></a>'.format(anchor, lineno)
+            if line_numbers:
+                p += '<span class="lineno">{:>{}}</span> '.format(lineno, width)
+            return p
+
+        yield prefix()
+        for text, fmt in pieces:
+            lines = text.split('\n')
+            for line in lines[:-1]:
+                if line:
+                    yield span(attrescape(fmt), escape(line)) if fmt else escape(line)
+                lineno += 1
+                yield '\n' + prefix()
+            line = lines[-1]
+            if line:
+                yield span(attrescape(fmt), escape(line)) if fmt else escape(line)
+
     def full_html(self, cursor, charset="utf-8"):
         """Returns the selected text as a complete HTML document.
 
@@ -85,9 +142,60 @@ class HtmlMixin:
             baseformat = self.baseformat() or "",
             html = self.html(cursor))
 
+    def write_html(self, cursor, file, full=False, charset="utf-8",
+                   line_numbers=False, anchor=None, buffer_size=65536, binary=None):
+        """Write HTML output for the selected range of the cursor to a file.
+
+        The ``file`` may be a text stream or a binary stream. Instead of
+        building the full HTML in memory, the output is collected in a buffer
+        which is written when it holds ``buffer_size`` characters, so the
+        memory usage does not depend on the size of the text.
+
+        If ``binary`` is None, the file is considered a binary stream if it is
+        a binary stream of the :mod:`io` module or its ``mode`` contains "b";
+        any other object with a ``write()`` method gets text. Set ``binary``
+        to True or False to override this.
+
+        If ``full`` is True, a complete HTML document is written, like
+        :meth:`full_html` returns. The ``charset`` is mentioned in the HTML
+        header, and is used to encode the HTML if the file is a binary stream.
+        Characters that can't be encoded are written as character references.
+
+        The ``line_numbers`` and ``anchor`` arguments are passed to
+        :meth:`iter_html`.
+
+        """
+        if binary is None:
+            binary = isinstance(file, (io.RawIOBase, io.BufferedIOBase)) \
+                or 'b' in str(getattr(file, 'mode', ''))
+        if binary:
+            write = lambda html: file.write(html.encode(charset, 'xmlcharrefreplace'))
+        else:
+            write = file.write
+
+        if full:
+            head, tail = FULL_HTML_TEMPLATE.split("{html}")
+            head = head.format(charset=charset, baseformat=self.baseformat() or "")
+        else:
+            head = tail = ""
+
+        buf = [head]
+        size = len(head)
+        for html in self.iter_html(cursor, line_numbers, anchor):
+            buf.append(html)
+            size += len(html)
+            if size >= buffer_size:
+                write("".join(buf))
+                buf.clear()
+                size = 0
+        buf.append(tail)
+        write("".join(buf))
+
 
 class HtmlFormatter(HtmlMixin, parce.formatter.Formatter):
     """A Formatter to output HTML."""
+    span = '<span style="{}">{}</span>'
+
     def __init__(self, theme=None, factory=None):
         if factory is None:
             factory = lambda tf: inline_css(tf) or None
@@ -113,10 +221,7 @@ class HtmlFormatter(HtmlMixin, parce.formatter.Formatter):
             <span style="font-weight: bold;">}</span>'
 
         """
-        span = '<span style="{}">{}</span>'.format
-        return "".join(
-            span(attrescape(fmt), escape(text)) if fmt else escape(text)
-            for text, fmt in self.format_document(cursor))
+        return super().html(cursor)
 
 
 class SimpleHtmlFormatter(HtmlMixin, parce.formatter.SimpleFormatter):
@@ -126,6 +231,8 @@ class SimpleHtmlFormatter(HtmlMixin, parce.formatter.SimpleFormatter):
     highlighting.
 
     """
+    span = '<span class="{}">{}</span>'
+
     def html(self, cursor):
         """Return HTML output for the selected range of the cursor.
 
@@ -149,10 +256,7 @@ class SimpleHtmlFormatter(HtmlMixin, parce.formatter.SimpleFormatter):
             ss="delimiter">;</span> <span class="delimiter bracket">}</span>'
 
         """
-        span = '<span class="{}">{}</span>'.format
-        return "".join(
-            span(attrescape(fmt), escape(text)) if fmt else escape(text)
-            for text, fmt in self.format_document(cursor))
+        return super().html(cursor)
 
 
 def escape(text):
@@ -113,6 +113,24 @@ want to query those in one go::
 
 
 
+On large trees that are queried often, you can create a :class:`TreeIndex`
+for the tree. As long as the index exists, queries like ``all.action(...)``,
+``all(lexicon)`` and ``all("text")`` look up the nodes in the index, instead
+of walking the whole tree::
+
+    index = TreeIndex(root)
+    index.connect_treebuilder(builder)  # rebuild the index when the tree changes
+    root.query.all.action(Comment).containing('TODO')    # uses the index
+
+
+A query chain that is run often, can be compiled into one traversal function
+using :func:`compile_query`. The compiled query can be used for any node::
+
+    imgs = compile_query(lambda q: q.all.action(Name.Tag)("img"))
+    imgs(root).count()      # number of "img" tags
+    imgs(root).next.list()  # a compiled query returns a normal Query
+
+
 Summary of the query methods:
 -----------------------------
 
@@ -196,11 +214,15 @@ action.
 """
 
 
+import bisect
 import collections
 import functools
+import heapq
 import itertools
 import re
 import sys
+import threading
+import weakref
 
 from .lexicon import Lexicon
 
@@ -227,11 +249,12 @@ class Query:
     contexts).
 
     """
-    __slots__ = '_gen', '_inv'
+    __slots__ = '_gen', '_inv', '_all_of'
 
-    def __init__(self, gen, invert=False):
+    def __init__(self, gen, invert=False, all_of=None):
         self._gen = gen
         self._inv = invert
+        self._all_of = all_of   # the source Query if we are its ``all``
 
     def __iter__(self):
         return self._gen()
@@ -357,10 +380,9 @@ class Query:
         else:
             for n in self:
                 if n.is_context:
-                    if key < 0:
-                        key += len(n)
-                    if 0 <= key < len(n):
-                        yield n[key]
+                    i = key + len(n) if key < 0 else key
+                    if 0 <= i < len(n):
+                        yield n[i]
 
     @pquery
     def children(self):
@@ -369,31 +391,15 @@ class Query:
             if n.is_context:
                 yield from n
 
-    @pquery
+    @property
     def all(self):
         """All descendants, contexts and their nodes."""
-        def innergen(n):
-            stack = []
-            j = 0
-            while True:
-                for i in range(j, len(n)):
-                    m = n[i]
-                    yield m
-                    if m.is_context:
-                        stack.append(i)
-                        j = 0
-                        n = m
-                        break
-                else:
-                    if stack:
-                        n = n.parent
-                        j = stack.pop() + 1
-                    else:
-                        break
-        for n in self:
-            yield n
-            if n.is_context:
-                yield from innergen(n)
+        def gen():
+            for n in self:
+                yield n
+                if n.is_context:
+                    yield from _descendants(n)
+        return Query(gen, all_of=self)
 
     @pquery
     def alltokens(self):
@@ -596,7 +602,18 @@ class Query:
     @property
     def is_not(self):
         """Invert the next query."""
-        return type(self)(self._gen, not self._inv)
+        return type(self)(self._gen, not self._inv, self._all_of)
+
+    def _indexed(self, keys, predicate):
+        """Yield the nodes of an ``all`` query that have one of the index keys.
+
+        The nodes are looked up in the :class:`TreeIndex` of the trees the
+        source nodes belong to. Where there is no index, the descendants
+        are walked and filtered using the ``predicate``.
+
+        """
+        for n in self._all_of:
+            yield from _all_indexed(n, keys, predicate)
 
     # invertible selectors
     @query
@@ -639,8 +656,16 @@ class Query:
         Lang.comment lexicon.
 
         """
+        def predicate(n):
+            # Lexicon.__eq__ does not know about contexts, so compare lexicons
+            return n in what or (n.is_context and n.lexicon in what)
+        if self._all_of is not None and not self._inv and all(
+                isinstance(w, (str, Lexicon)) for w in what):
+            keys = [_lexicon_key(w) if isinstance(w, Lexicon) else w for w in what]
+            yield from self._indexed(keys, predicate)
+            return
         for n in self:
-            if self._inv ^ (n in what):
+            if self._inv ^ predicate(n):
                 yield n
 
     @query
@@ -680,6 +705,10 @@ class Query:
     @query
     def action(self, *actions):
         """Yield those tokens whose action *is* one of the given actions."""
+        if self._all_of is not None and not self._inv:
+            keys = [_ActionKey(a) for a in actions]
+            yield from self._indexed(keys, lambda n: n.is_token and n.action in actions)
+            return
         for t in self:
             if t.is_token and self._inv ^ (t.action in actions):
                 yield t
@@ -691,3 +720,602 @@ class Query:
             if t.is_token and self._inv ^ any(t.action in a for a in actions):
                 yield t
 
+
+
+class CompiledQuery:
+    """A query chain compiled into one traversal function.
+
+    Don't instantiate this class directly, but use :func:`compile_query`.
+    Call a CompiledQuery with one or more nodes to get a :class:`Query`
+    yielding the results for those nodes.
+
+    """
+    __slots__ = 'steps', '_func'
+
+    def __init__(self, steps, func):
+        self.steps = steps  #: the recorded steps, (name, args, kwargs) tuples
+        self._func = func
+
+    def __repr__(self):
+        return "<{} {}>".format(type(self).__name__, "".join(
+            _step_repr(name, args, kwargs) for name, args, kwargs in self.steps))
+
+    def __call__(self, *nodes):
+        """Return a Query yielding the results for the nodes."""
+        return Query(lambda: self._func(nodes))
+
+
+def compile_query(func):
+    """Compile a query chain into a :class:`CompiledQuery`.
+
+    The ``func`` is called with a placeholder object, on which the query chain
+    should be built, e.g.::
+
+        imgs = compile_query(lambda q: q.all.action(Name.Tag)("img").next)
+        for node in imgs(root):
+            ...
+
+    The chain is compiled into one generator function, which loops over the
+    nodes without a generator frame per step, and filters the nodes with
+    combined conditions. An ``all`` followed by ``in_range()`` only visits the
+    nodes overlapping the range, and an ``all`` followed by ``action()`` or
+    ``("text")`` uses a :class:`TreeIndex` if available. Steps that need the
+    full result set (like ``uniq`` and ``slice()``) are performed by the
+    normal Query methods.
+
+    The compiled query does not depend on a tree and can be reused. The most
+    recently compiled queries are cached (see :data:`COMPILED_QUERIES_MAXSIZE`),
+    so compiling the same chain again is cheap.
+
+    """
+    steps = func(_Recorder())._steps
+    # slices are not hashable
+    key = tuple((name, tuple((slice, a.start, a.stop, a.step)
+                    if isinstance(a, slice) else a for a in args), kwargs)
+                for name, args, kwargs in steps)
+    try:
+        with _compiled_queries_lock:
+            cq = _compiled_queries[key]
+            _compiled_queries.move_to_end(key)
+            return cq
+    except KeyError:
+        pass
+    except TypeError:
+        return CompiledQuery(steps, _compile(steps))    # unhashable arguments
+    cq = CompiledQuery(steps, _compile(steps))
+    with _compiled_queries_lock:
+        _compiled_queries[key] = cq
+        while len(_compiled_queries) > COMPILED_QUERIES_MAXSIZE:
+            _compiled_queries.popitem(False)
+    return cq
+
+
+#: The maximum number of compiled queries kept by :func:`compile_query`.
+COMPILED_QUERIES_MAXSIZE = 256
+
+_compiled_queries = collections.OrderedDict()
+_compiled_queries_lock = threading.Lock()
+
+
+class _Recorder:
+    """Records the steps of a query chain for :func:`compile_query`."""
+    __slots__ = '_steps',
+
+    #: the Query methods that can be recorded, besides the properties
+    methods = (
+        'map', 'filter', 'slice', 'len', 'in_range', 'startingwith',
+        'endingwith', 'containing', 'matching', 'action', 'in_action',
+    )
+
+    def __init__(self, steps=()):
+        self._steps = steps
+
+    def _add(self, name, args=(), kwargs={}):
+        return _Recorder(self._steps + ((name, args, tuple(sorted(kwargs.items()))),))
+
+    def __getattr__(self, name):
+        if isinstance(getattr(Query, name, None), property):
+            return self._add(name)
+        elif name in self.methods:
+            return lambda *args, **kwargs: self._add(name, args, kwargs)
+        raise AttributeError("can't compile query method: {}".format(name))
+
+    def __call__(self, *what):
+        return self._add('__call__', what)
+
+    def __getitem__(self, key):
+        return self._add('__getitem__', (key,))
+
+
+def _step_repr(name, args, kwargs):
+    """Return a readable representation of a recorded step."""
+    args = ", ".join(itertools.chain(map(repr, args),
+        ("{}={!r}".format(k, v) for k, v in kwargs)))
+    if name == '__call__':
+        return "({})".format(args)
+    elif name == '__getitem__':
+        return "[{}]".format(args)
+    elif name in _Recorder.methods:
+        return ".{}({})".format(name, args)
+    return "." + name
+
+
+# Navigating steps for the compiler. Every step is a list of lines of code that
+# loop over or assign nodes {m} from {v}. The lines are formatted with the
+# constant names {c0}, {c1} etc. for the arguments.
+_navigators = {
+    'children': ["if {v}.is_context:", "for {m} in {v}:"],
+    'all': ["for {m} in _all({v}):"],
+    'alltokens': ["for {m} in (({v},) if {v}.is_token else {v}.tokens()):"],
+    'allcontexts': ["if {v}.is_context:", "for {m} in _all({v}):", "if {m}.is_context:"],
+    'parent': ["{m} = {v}.parent", "if {m}:"],
+    'ancestors': ["for {m} in {v}.ancestors():"],
+    'first': ["if {v} and {v}.is_context:", "{m} = {v}[0]"],
+    'last': ["if {v} and {v}.is_context:", "{m} = {v}[-1]"],
+    'next': ["{m} = {v}.next_token()", "if {m}:"],
+    'previous': ["{m} = {v}.previous_token()", "if {m}:"],
+    'forward': ["for {m} in {v}.forward():"],
+    'backward': ["for {m} in {v}.backward():"],
+    'right': ["{m} = {v}.right_sibling()", "if {m}:"],
+    'left': ["{m} = {v}.left_sibling()", "if {m}:"],
+    'right_siblings': ["for {m} in {v}.right_siblings():"],
+    'left_siblings': ["for {m} in {v}.left_siblings():"],
+    'map': ["for {m} in {c0}({v}):"],
+}
+
+
+def _filter(name, args, kwargs, invert):
+    """Return a tuple(expression, constants) for a filtering step, or None.
+
+    The expression refers to the node as {v}, and to the constants as {c0},
+    {c1}, etc.
+
+    """
+    inv = "not " if invert else ""
+    kwargs = dict(kwargs)
+    if name == 'tokens':
+        return "{v}.is_token", ()
+    elif name == 'contexts':
+        return "{v}.is_context", ()
+    elif name == 'filter':
+        return "{c0}({v})", args
+    elif name == 'len':
+        min_length, max_length = _bind_len(*args, **kwargs)
+        if max_length is None:
+            return "{v}.is_context and " + inv + "len({v}) == {c0}", (min_length,)
+        return "{v}.is_context and " + inv + "{c0} <= len({v}) <= {c1}", (min_length, max_length)
+    elif name == 'in_range':
+        start, end = _bind_in_range(*args, **kwargs)
+        if invert:
+            return "({v}.end <= {c0} or {v}.pos >= {c1})", (start, end)
+        return "({v}.pos >= {c0} and {v}.end <= {c1})", (start, end)
+    elif name == '__call__':
+        return inv + "({v} in {c0} or ({v}.is_context and {v}.lexicon in {c0}))", (args,)
+    elif name == 'startingwith':
+        return "{v}.is_token and " + inv + "{v}.text.startswith({c0})", args
+    elif name == 'endingwith':
+        return "{v}.is_token and " + inv + "{v}.text.endswith({c0})", args
+    elif name == 'containing':
+        return "{v}.is_token and " + inv + "({c0} in {v}.text)", args
+    elif name == 'matching':
+        search = re.compile(*args, **kwargs).search
+        return "{v}.is_token and " + inv + "{c0}({v}.text)", (search,)
+    elif name == 'action':
+        return "{v}.is_token and " + inv + "({v}.action in {c0})", (args,)
+    elif name == 'in_action':
+        return "{v}.is_token and " + inv + "any({v}.action in a for a in {c0})", (args,)
+
+
+def _bind_len(min_length, max_length=None):
+    """Return the arguments of :meth:`Query.len`."""
+    return min_length, max_length
+
+
+def _bind_in_range(start=0, end=None):
+    """Return the arguments of :meth:`Query.in_range`, with end filled in."""
+    return start, sys.maxsize if end is None else end
+
+
+def _compile(steps):
+    """Compile the steps recorded by a _Recorder into a generator function.
+
+    The function is called with an iterable of nodes and yields the results.
+
+    """
+    # resolve is_not, and split the steps in segments at the steps that can't
+    # be compiled
+    segments = [[]]
+    invert = False
+    for name, args, kwargs in steps:
+        if name == 'is_not':
+            invert = not invert
+            continue
+        if name in _navigators or name == '__getitem__' or _filter(name, args, kwargs, invert):
+            segments[-1].append((name, args, kwargs, invert))
+        else:
+            segments.append((name, args, kwargs, invert))
+            segments.append([])
+        invert = False
+
+    # every function gets and returns a callable returning an iterator
+    funcs = []
+    for segment in segments:
+        if isinstance(segment, list):
+            if segment:
+                funcs.append(functools.partial(_segment_step, _compile_segment(segment)))
+        else:
+            funcs.append(functools.partial(_query_step, *segment))
+
+    def run(nodes):
+        source = lambda: iter(nodes)
+        for func in funcs:
+            source = func(source)
+        return source()
+    return run
+
+
+def _segment_step(gen, source):
+    """Return a callable returning the iterator of a compiled segment."""
+    return lambda: gen(source())
+
+
+def _query_step(name, args, kwargs, invert, source):
+    """Return a callable returning the iterator of a normal Query step."""
+    q = getattr(Query(source, invert), name)
+    if name in _Recorder.methods:
+        q = q(*args, **dict(kwargs))
+    return q.__iter__
+
+
+def _compile_segment(steps):
+    """Compile a list of navigating and filtering steps into a generator function."""
+    namespace = {
+        '_all': _all,
+        '_all_range': _all_range,
+        '_index_select': _index_select,
+    }
+    def constants(values):
+        """Store the values in the namespace, return a dict with their names."""
+        names = {}
+        for i, value in enumerate(values):
+            name = "c{}".format(len(namespace))
+            namespace[name] = value
+            names["c{}".format(i)] = name
+        return names
+
+    lines = ["def gen(nodes):", " for n0 in nodes:"]
+    indent = 2
+    var = "n0"
+    conditions = []
+
+    def flush():
+        nonlocal indent
+        if conditions:
+            lines.append(" " * indent + "if {}:".format(" and ".join(conditions)))
+            conditions.clear()
+            indent += 1
+
+    footers = []    # (indent, lines) to add after the innermost code
+
+    i = 0
+    while i < len(steps):
+        name, args, kwargs, invert = steps[i]
+        i += 1
+        if name in _navigators:
+            flush()
+            new_var = "n{}".format(i)
+            code = _navigators[name]
+            if name == 'all':
+                # walk the tree inline, using a stack of iterators; optimize
+                # all.in_range() and all.action() etc.
+                code = ["{s} = [iter(({v},))]"]
+                descend = "{m}.is_context"
+                next_name, next_args, next_kwargs, next_invert = \
+                    steps[i] if i < len(steps) else (None, None, None, None)
+                if next_name == 'in_range' and not next_invert:
+                    args = _bind_in_range(*next_args, **dict(next_kwargs))
+                    code = ["{s} = [_all_range({v}, {c0}, {c1})]"]
+                    descend = None
+                elif next_name in ('action', '__call__') and not next_invert and (
+                        next_name == 'action' or all(isinstance(w, (str, Lexicon)) for w in next_args)):
+                    # the filter is applied again, but that's cheap
+                    if next_name == 'action':
+                        keys = [_ActionKey(a) for a in next_args]
+                    else:
+                        keys = [_lexicon_key(w) if isinstance(w, Lexicon) else w for w in next_args]
+                    args = (keys,)
+                    code = [
+                        "{x} = _index_select({v}, {c0})",
+                        "{s} = [iter(({v},) if {x} is None else {x})]",
+                    ]
+                    descend = "{x} is None and {m}.is_context"
+                code += ["while {s}:", "for {m} in {s}[-1]:"]
+                if descend:
+                    footer = ["if " + descend + ":", "    {s}.append(iter({m}))", "    break"]
+                else:
+                    footer = []
+                footer.append("else:")  # at the indent of the for statement
+                footer.append("    {s}.pop()")
+                fmt = dict(v=var, m=new_var, s="s{}".format(i), x="x{}".format(i), **constants(args))
+                for line in code:
+                    lines.append(" " * indent + line.format(**fmt))
+                    if line.endswith(":"):
+                        indent += 1
+                footers.append((indent, [line.format(**fmt) for line in footer]))
+            else:
+                names = constants(args)
+                for line in code:
+                    lines.append(" " * indent + line.format(v=var, m=new_var, **names))
+                    if line.endswith(":"):
+                        indent += 1
+            var = new_var
+        elif name == '__getitem__':
+            flush()
+            key = args[0]
+            new_var = "n{}".format(i)
+            names = constants((key,))
+            lines.append(" " * indent + "if {}.is_context:".format(var))
+            indent += 1
+            if isinstance(key, slice):
+                lines.append(" " * indent + "for {} in {}[{}]:".format(new_var, var, names['c0']))
+                indent += 1
+            else:
+                lines.append(" " * indent + "k = {c} + len({v}) if {c} < 0 else {c}".format(c=names['c0'], v=var))
+                lines.append(" " * indent + "if 0 <= k < len({}):".format(var))
+                indent += 1
+                lines.append(" " * indent + "{} = {}[k]".format(new_var, var))
+            var = new_var
+        else:
+            expr, consts = _filter(name, args, kwargs, invert)
+            conditions.append(expr.format(v=var, **constants(consts)))
+    flush()
+    lines.append(" " * indent + "yield " + var)
+    for indent, footer in reversed(footers):
+        for line in footer:
+            if line == "else:":
+                indent -= 1
+            lines.append(" " * indent + line)
+    exec(compile("\n".join(lines), "<compiled query>", "exec"), namespace)
+    return namespace['gen']
+
+
+class TreeIndex:
+    """Secondary indexes for a tree, to speed up queries on large trees.
+
+    While a TreeIndex for a tree exists, the ``all.action()``, ``all(lexicon)``
+    and ``all("text")`` queries on (nodes of) that tree look up the tokens and
+    contexts in the index instead of walking the tree. The index keeps the
+    tokens per action and per text, and the contexts per lexicon, in document
+    order. Keep a reference to the TreeIndex (or keep it connected to a
+    TreeBuilder) as long as you want to use it.
+
+    The index is built on first use, and rebuilt on first use after
+    :meth:`invalidate` has been called. Use :meth:`connect_treebuilder` to
+    do this automatically when a TreeBuilder changes the tree; when you
+    modify the tree yourself, call :meth:`invalidate`.
+
+    """
+    _indexes = weakref.WeakValueDictionary()  # root: TreeIndex
+
+    def __init__(self, root):
+        self._root = root
+        self._lock = threading.Lock()
+        self._index = None
+        self._spans = None
+        self._indexes[root] = self
+
+    @classmethod
+    def get(cls, node):
+        """Return the TreeIndex for the tree the node belongs to, if any."""
+        if cls._indexes:
+            return cls._indexes.get(node.root())
+
+    def root(self):
+        """Return the root of the indexed tree."""
+        return self._root
+
+    def invalidate(self, node=None):
+        """Mark the index outdated; it will be rebuilt on first use.
+
+        The ``node`` argument is ignored; it allows connecting this method to
+        the ``"invalidate"`` event of a TreeBuilder.
+
+        """
+        self._index = self._spans = None
+
+    def connect_treebuilder(self, builder):
+        """Connect to the TreeBuilder, to invalidate the index when it changes the tree."""
+        builder.connect("invalidate", self.invalidate)
+
+    def disconnect_treebuilder(self, builder):
+        """Disconnect from the TreeBuilder."""
+        builder.disconnect("invalidate", self.invalidate)
+
+    def select(self, context, keys):
+        """Return an iterable of the nodes in context (including the context
+        itself) having one of the keys, in document order.
+
+        A key is a token text, an action key or a lexicon key. Returns None
+        if the context is not in the indexed tree.
+
+        """
+        with self._lock:
+            if self._index is None:
+                self._build()
+            index, spans = self._index, self._spans
+        try:
+            start, end = spans[context]
+        except KeyError:
+            return
+        slices = []
+        for key in keys:
+            try:
+                serials, nodes = index[key]
+            except KeyError:
+                continue
+            i = bisect.bisect_left(serials, start)
+            j = bisect.bisect_right(serials, end)
+            if i < j:
+                slices.append(zip(serials[i:j], nodes[i:j]))
+        if len(slices) == 1:
+            return (n for serial, n in slices[0])
+        return (n for serial, n in heapq.merge(*slices))
+
+    def _build(self):
+        """Build the index.
+
+        Every node gets a serial number in document order, and every context
+        the range of serial numbers of itself and its descendants.
+
+        """
+        index = collections.defaultdict(lambda: ([], []))  # key: (serials, nodes)
+        spans = {}  # context: (serial, last serial of descendants)
+
+        def add(key, serial, node):
+            serials, nodes = index[key]
+            serials.append(serial)
+            nodes.append(node)
+
+        root = self._root
+        serial = start = 0
+        add(_lexicon_key(root.lexicon), serial, root)
+        stack = []
+        node, i = root, 0
+        while True:
+            for i in range(i, len(node)):
+                m = node[i]
+                serial += 1
+                if m.is_token:
+                    add(m.text, serial, m)
+                    add(_ActionKey(m.action), serial, m)
+                else:
+                    add(_lexicon_key(m.lexicon), serial, m)
+                    stack.append((node, i + 1, start))
+                    node, i, start = m, 0, serial
+                    break
+            else:
+                spans[node] = (start, serial)
+                if not stack:
+                    break
+                node, i, start = stack.pop()
+        self._index = dict(index)
+        self._spans = spans
+
+
+class _ActionKey(collections.namedtuple("_ActionKey", "action")):
+    """Key for tokens with an action in the TreeIndex (distinct from texts)."""
+    __slots__ = ()
+
+
+def _lexicon_key(lexicon):
+    """Key for contexts with a lexicon in the TreeIndex.
+
+    Contexts compare equal with derived lexicons of their lexicon, so the
+    key is the same for all derivates.
+
+    """
+    return lexicon and (lexicon.descriptor, lexicon.language)
+
+
+def _index_select(node, keys):
+    """Return the node and its descendants that have one of the index keys.
+
+    Returns None if there is no TreeIndex for the node.
+
+    """
+    if node.is_context:
+        index = TreeIndex.get(node)
+        if index:
+            return index.select(node, keys)
+
+
+def _all_indexed(node, keys, predicate):
+    """Yield the node and its descendants that have one of the index keys.
+
+    Uses the TreeIndex if available, otherwise the nodes are filtered using
+    the predicate.
+
+    """
+    if node.is_context:
+        nodes = _index_select(node, keys)
+        if nodes is not None:
+            yield from nodes
+            return
+        if predicate(node):
+            yield node
+        for n in _descendants(node):
+            if predicate(n):
+                yield n
+    elif predicate(node):
+        yield node
+
+
+def _all(node):
+    """Yield the node and, if it is a context, all its descendants."""
+    yield node
+    if node.is_context:
+        yield from _descendants(node)
+
+
+def _all_range(node, start, end):
+    """Yield the node and its descendants that overlap the range start→end.
+
+    Using bisection, only the nodes overlapping the range are visited.
+
+    """
+    if node.end > start and node.pos < end:
+        yield node
+        if node.is_context:
+            yield from _descendants_range(node, start, end)
+
+
+def _descendants_range(context, start, end):
+    """Yield the descendants of the context that overlap start→end, in
+    document order.
+
+    """
+    stack = []
+    node, i = context, context.find(start)
+    while True:
+        if i != -1:
+            for i in range(i, len(node)):
+                n = node[i]
+                if n.pos >= end:
+                    return  # all further nodes are right of end
+                yield n
+                if n.is_context:
+                    j = n.find(start)
+                    if j != -1:
+                        stack.append((node, i + 1))
+                        node, i = n, j
+                        break
+            else:
+                i = -1
+            if i != -1:
+                continue
+        if not stack:
+            return
+        node, i = stack.pop()
+        if i == len(node):
+            i = -1
+
+
+def _descendants(node):
+    """Yield all descendants of the context, in document order."""
+    stack = []
+    j = 0
+    while True:
+        for i in range(j, len(node)):
+            m = node[i]
+            yield m
+            if m.is_context:
+                stack.append(i)
+                j = 0
+                node = m
+                break
+        else:
+            if stack:
+                node = node.parent
+                j = stack.pop() + 1
+            else:
+                break
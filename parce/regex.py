@@ -23,9 +23,17 @@ Utility module with functions to construct or manipulate regular expressions.
 """
 
 
+import bisect
+import collections
+import hashlib
+import os
 import re
+import threading
+import time
 import unicodedata
 
+from . import pkginfo
+
 
 def words2regexp(words):
     """Convert the word list to an optimized regular expression.
@@ -38,7 +46,15 @@ def words2regexp(words):
         >>> parce.regex.words2regexp(['car', 'cdr', 'caar', 'cadr', 'cdar', 'cddr'])
         'c[ad]{1,2}r'
 
+    The result is cached in the :data:`words_cache`, so converting the same
+    word list again is cheap.
+
     """
+    return words_cache.get(words, _words2regexp)
+
+
+def _words2regexp(words):
+    """Implementation of :func:`words2regexp`, without caching."""
     words, suffix = common_suffix(words)
     root = make_trie(words)
     r = trie_to_regexp_tuple(root)
@@ -47,6 +63,95 @@ def words2regexp(words):
     return build_regexp(r)
 
 
+class WordsCache:
+    """Caches the regular expressions created from word lists.
+
+    In memory, the expressions are stored under a hash of the sorted set of
+    the words, because the order of the words and duplicates don't matter.
+    At most ``maxsize`` expressions are kept in memory; when more are added,
+    the least recently used ones are discarded. If the ``directory`` attribute
+    is set, the expressions are also stored in that directory, so another
+    process does not need to build them again.
+
+    The ``time`` attribute holds the total time in seconds spent building
+    expressions; ``hits`` and ``misses`` count the lookups.
+
+    """
+    directory = None    #: if set, the directory to store expressions in
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._exprs = collections.OrderedDict()
+        self.time = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, words, build):
+        """Return the expression for the words, calling ``build(words)`` if needed.
+
+        The words are given to ``build`` as a sorted tuple without duplicates.
+
+        """
+        words = tuple(sorted(set(words)))
+        h = hashlib.sha1(pkginfo.version_string.encode())
+        for w in words:
+            h.update(w.encode('utf-8', 'surrogatepass'))
+            h.update(b'\0')
+        key = h.hexdigest()
+        with self._lock:
+            try:
+                expr = self._exprs[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._exprs.move_to_end(key)
+                self.hits += 1
+                return expr
+        expr = cache_file = None
+        if self.directory:
+            cache_file = os.path.join(self.directory, key + ".re")
+            try:
+                with open(cache_file, encoding='utf-8', errors='surrogatepass') as f:
+                    expr = f.read()
+            except (OSError, UnicodeError):
+                pass    # not yet stored, or unreadable
+        if expr is None:
+            t = time.perf_counter()
+            expr = build(words)
+            with self._lock:
+                self.time += time.perf_counter() - t
+            if cache_file:
+                try:
+                    os.makedirs(self.directory, exist_ok=True)
+                    # write to a temporary file first, other processes
+                    # must not read a partially written expression
+                    tmp = "{}.{}.{}".format(cache_file, os.getpid(), threading.get_ident())
+                    with open(tmp, 'w', encoding='utf-8', errors='surrogatepass') as f:
+                        f.write(expr)
+                    os.replace(tmp, cache_file)
+                except OSError:
+                    pass
+        with self._lock:
+            exprs = self._exprs
+            exprs[key] = expr
+            exprs.move_to_end(key)
+            while len(exprs) > self.maxsize:
+                exprs.popitem(False)
+        return expr
+
+    def clear(self):
+        """Forget the expressions cached in memory, and reset the counters."""
+        with self._lock:
+            self._exprs.clear()
+            self.time = 0.0
+            self.hits = self.misses = 0
+
+
+#: The global WordsCache used by :func:`words2regexp`.
+words_cache = WordsCache()
+
+
 def make_charclass(chars):
     """Return a string with adjacent characters grouped.
 
@@ -86,12 +191,7 @@ def common_suffix(words):
         (['op', 'om', 'mam', 'pap'], 'a')
 
     """
-    suffix = []
-    for s in map(set, zip(*map(reversed, words))):
-        if len(s) != 1:
-            break
-        suffix.append(s.pop())
-    suffix = ''.join(reversed(suffix))
+    suffix = os.path.commonprefix([word[::-1] for word in words])[::-1]
     if suffix:
         i = -len(suffix)
         words = [word[:i] for word in words]
@@ -186,36 +286,39 @@ def make_trie(words, reverse=False):
         }
 
     """
-    if reverse:
-        chars = lambda word: word[::-1]
-        add = lambda k1, k2: k2 + k1
-    else:
-        chars = lambda word: word
-        add = lambda k1, k2: k1 + k2
-
+    # The words are sorted, so all words below a node are adjacent, and the
+    # trie can be built without recursion, directly with the merged keys.
+    words = sorted(set(w[::-1] for w in words) if reverse else set(words))
     root = {}
-    for w in words:
-        d = root
-        for c in chars(w):
-            d = d.setdefault(c, {})
-        d[None] = True  # end
-
-    # merge characters that are the only child with their parents
-    def merge(node):
-        for key, node in node.items():
-            if key:
-                while len(node) == 1:
-                    k, n = next(iter(node.items()))
-                    if k:
-                        key = add(key, k)
-                        node = n
-                    else:
-                        break
-                else:
-                    node = dict(merge(node))
-            yield key, node
-
-    return dict(merge(root))
+    stack = [(root, 0, len(words), 0)]
+    while stack:
+        node, lo, hi, depth = stack.pop()
+        if lo < hi and len(words[lo]) == depth:
+            node[None] = True   # end
+            lo += 1
+        while lo < hi:
+            word = words[lo]
+            c = word[depth]
+            # find the end of the run of words with c at depth
+            if c == '\U0010ffff':
+                end = hi
+            else:
+                end = bisect.bisect_left(words, word[:depth] + chr(ord(c) + 1), lo, hi)
+            if end - lo == 1:
+                key = word[depth:]
+                child = {None: True}
+            else:
+                # find the common prefix of the run
+                last = words[end - 1]
+                i, j = depth + 1, min(len(word), len(last))
+                while i < j and word[i] == last[i]:
+                    i += 1
+                key = word[depth:i]
+                child = {}
+                stack.append((child, lo, end, i))
+            node[key[::-1] if reverse else key] = child
+            lo = end
+    return root
 
 
 def trie_to_regexp_tuple(node, reverse=False):
@@ -288,50 +391,58 @@ def trie_to_regexp_tuple(node, reverse=False):
     else:
         combine = lambda r1, r2: r1 + r2
 
-    if len(node) == 1:
-        for k, n in node.items():
-            if k:
-                return combine((k,), trie_to_regexp_tuple(n, reverse))
-            return ()
-    else:
-        seen = []
-        keys = []
-        groups = set()
-
-        # group the nodes if they have the same leaf node
-        for k, n in node.items():
-            if k:
-                try:
-                    i = seen.index(n)
-                except ValueError:
-                    i = len(seen)
-                    seen.append(n)
-                    keys.append([k])
+    # Convert the nodes iteratively, the children first. Equal results are
+    # interned, so the children with equal nodes (which yield equal results)
+    # can be grouped using a dictionary.
+    results = {}    # id(node) -> result
+    interned = {}
+    backwards = {}  # cache for keys optimized backwards
+    stack = [(node, False)]
+    while stack:
+        n, visited = stack.pop()
+        if not visited:
+            stack.append((n, True))
+            stack.extend((c, False) for k, c in n.items() if k and id(c) not in results)
+            continue
+        if len(n) == 1:
+            for k, c in n.items():
+                r = combine((k,), results[id(c)]) if k else ()
+        else:
+            groups = set()
+            # group the nodes if they have the same leaf node
+            same = {}
+            for k, c in n.items():
+                if k:
+                    same.setdefault(results[id(c)], []).append(k)
                 else:
-                    keys[i].append(k)
-            else:
-                groups.add(None)    # means optional group, may end here
+                    groups.add(None)    # means optional group, may end here
 
-        for keys, node in zip(keys, seen):
-            if len(keys) == 1:
-                if not any(node):
-                    groups.add(keys[0])
-                else:
-                    groups.add(combine((keys[0],), trie_to_regexp_tuple(node, reverse)))
-            else:
-                if not reverse:
-                    # try to optimize the keys backwards
-                    r = trie_to_regexp_tuple(make_trie(keys, True), True)
-                    if r == (frozenset(keys),) and not any(node):
+            for sub, keys in same.items():
+                if len(keys) == 1:
+                    groups.add(combine((keys[0],), sub) if sub else keys[0])
+                    continue
+                elif not reverse:
+                    # try to optimize the keys backwards; not possible
+                    # if they all end with a different character
+                    fkeys = frozenset(keys)
+                    if len(set(k[-1] for k in keys)) == len(keys):
+                        r = (fkeys,)
+                    else:
+                        r = backwards.get(fkeys)
+                        if r is None:
+                            r = backwards[fkeys] = trie_to_regexp_tuple(make_trie(keys, True), True)
+                    if r == (fkeys,) and not sub:
                         groups.update(keys)
                         continue
-                elif not any(node):
+                elif not sub:
                     groups.update(keys)
                     continue
                 else:
                     r = (frozenset(keys),)
-                groups.add(combine(r, trie_to_regexp_tuple(node, reverse)))
-        return groups.pop() if len(groups) == 1 else (frozenset(groups),)
+                groups.add(combine(r, sub))
+            r = groups.pop() if len(groups) == 1 else (frozenset(groups),)
+        results[id(n)] = interned.setdefault(r, r)
+    return results[id(node)]
 
 
 def build_regexp(r):
@@ -386,8 +497,7 @@ def build_regexp(r):
                     # remove otherwise empty parent group if possible
                     if not exprs and len(tuples) == 1:
                         # there is only one subexpression in the group
-                        r = next(iter(tuples))
-                        items = merge_items(r)
+                        items = merged[next(iter(tuples))]
                         # if our group has no qualifier, just yield the subgroup
                         if mincount:
                             yield from items
@@ -419,53 +529,82 @@ def build_regexp(r):
                 items.append([item, mincount, maxcount])
         return items
 
-    items = merge_items(r)
-
-    # now really construct the regexp string for each item
-    result = []
-    for item, mincount, maxcount in items:
-        # qualifier to use
-        if mincount == 1 and maxcount == 1:
-            qualifier = ''
-        elif mincount == 0 and maxcount == 1:
-            qualifier = "?"
-        elif mincount == maxcount:
-            qualifier = "{{{0}}}".format(maxcount)
-        else:
-            qualifier = "{{{0},{1}}}".format(mincount or '', maxcount or '')
-        # make the rx
-        if isinstance(item, str):
-            rx = re.escape(item)
-            enclose = len(item) > 1 and qualifier
-            # replace x{1,2} with xx?, looks better and is 3 chars shorter
-            if len(rx) == 1 and mincount == 1 and maxcount == 2:
-                rx += rx
+    def build(items):
+        """Construct the regexp string for the merged items."""
+        result = []
+        for item, mincount, maxcount in items:
+            # qualifier to use
+            if mincount == 1 and maxcount == 1:
+                qualifier = ''
+            elif mincount == 0 and maxcount == 1:
                 qualifier = "?"
-        else:
-            exprs, tuples = item
-            # separate single characters from longer strings
-            chars, strings = set(), set()
-            for k in exprs:
-                (chars if len(k) == 1 else strings).add(k)
-            group = []
-            if chars:
-                if len(chars) == 1:
-                    group.append(re.escape(next(iter(chars))))
-                else:
-                    group.append('[' + make_charclass(chars) + ']')
-            if strings:
-                group.extend(map(re.escape, sorted(strings)))
-            if tuples:
-                group.extend(map(build_regexp, tuples))
-            if chars and not strings and not tuples:
-                rx = group[0]
-                enclose = False
+            elif mincount == maxcount:
+                qualifier = "{{{0}}}".format(maxcount)
+            else:
+                qualifier = "{{{0},{1}}}".format(mincount or '', maxcount or '')
+            # make the rx
+            if isinstance(item, str):
+                rx = re.escape(item)
+                enclose = len(item) > 1 and qualifier
+                # replace x{1,2} with xx?, looks better and is 3 chars shorter
+                if len(rx) == 1 and mincount == 1 and maxcount == 2:
+                    rx += rx
+                    qualifier = "?"
             else:
-                rx = '|'.join(group)
-                enclose = len(items) > 1 or qualifier
-        if enclose:
-            rx = '(?:' + rx + ')'
-        result.append(rx + qualifier)
-    return ''.join(result)
+                exprs, tuples = item
+                # separate single characters from longer strings
+                chars, strings = set(), set()
+                for k in exprs:
+                    (chars if len(k) == 1 else strings).add(k)
+                group = []
+                if chars:
+                    if len(chars) == 1:
+                        group.append(re.escape(next(iter(chars))))
+                    else:
+                        group.append('[' + make_charclass(chars) + ']')
+                if strings:
+                    group.extend(map(re.escape, sorted(strings)))
+                if tuples:
+                    group.extend(map(built.get, tuples))
+                if chars and not strings and not tuples:
+                    rx = group[0]
+                    enclose = False
+                else:
+                    rx = '|'.join(group)
+                    enclose = len(items) > 1 or qualifier
+            if enclose:
+                rx = '(?:' + rx + ')'
+            result.append(rx + qualifier)
+        return ''.join(result)
+
+    # Handle the nested tuples first, so no recursion is needed for deeply
+    # nested expressions.
+    order = []
+    stack = [(r, False)]
+    seen = set()
+    while stack:
+        t, visited = stack.pop()
+        if visited:
+            order.append(t)
+        elif t not in seen:
+            seen.add(t)
+            stack.append((t, True))
+            stack.extend((k, False) for item in t if not isinstance(item, str)
+                                   for k in item if isinstance(k, tuple))
+    merged = {}
+    for t in order:
+        merged[t] = merge_items(t)
+    # only build the tuples that are used as an alternative in a group
+    needed = {r}
+    for t in reversed(order):
+        if t in needed:
+            for item, mincount, maxcount in merged[t]:
+                if not isinstance(item, str):
+                    needed.update(item[1])
+    built = {}
+    for t in order:
+        if t in needed:
+            built[t] = build(merged[t])
+    return built[r]
 
 
@@ -30,7 +30,13 @@ to separate module name, class name and the name of the root lexicon.
 Use :func:`find` to find a language definition by name, or :func:`suggest` to
 find a language definition for a particular file type. There is basic
 functionality to pick a language definition based on file name, mime type
-and/or the contents of the file.
+and/or the contents of the file. To find language definitions for many files
+in one go, use :func:`suggest_many`.
+
+To keep the startup time of an application low, :func:`root_lexicon` and
+:func:`parce.find` can return a :class:`~parce.lexicon.LazyLexicon`, which
+imports the language definition only when it is used for parsing. The
+:func:`import_times` function reports how long the imports took.
 
 Using the :func:`register` function it is possible to register your own
 language definitions at runtime and make them available through parce.
@@ -48,7 +54,10 @@ import fnmatch
 import importlib
 import itertools
 import operator
+import os
 import re
+import sys
+import time
 
 
 Item = collections.namedtuple("Item", (
@@ -129,19 +138,18 @@ class Registry(dict):
         lexicon, e.g. ``"parce.lang.css.Css.root"``.
 
         """
+        index = self._get_index()
         weights = collections.defaultdict(int)
         if filename:
-            for name in self:
-                weight = max((w for pat, w in self[name].filenames
-                               if fnmatch.fnmatch(filename, pat)), default=0)
-                if weight:
-                    weights[name] += weight
+            found = index.filename_weights(filename)
+            for name in sorted(found, key=index.order.get):
+                weights[name] += found[name]
         if mimetype:
-            for name in self:
-                weight = max((w for mtype, w in self[name].mimetypes
-                               if mtype == mimetype), default=0)
-                if weight:
-                    weights[name] += weight
+            found = index.mimetypes.get(mimetype)
+            if found:
+                for name in sorted(found, key=index.order.get):
+                    if found[name]:
+                        weights[name] += found[name]
 
         # check the contents only if no filename/mimetype matched
         # or there were multiple matches with the same weight
@@ -154,12 +162,70 @@ class Registry(dict):
         if contents:
             contents = contents[:5000]
             for name in names:
-                weight = sum(w for regex, w in self[name].guesses
-                               if re.search(regex, contents))
+                weight = sum(w for search, w in index.guesses[name]
+                               if search(contents))
                 if weight:
                     weights[name] += weight
         return sorted(weights, key=weights.get, reverse=True)
 
+    def suggest_many(self, queries):
+        """Return a list with the result of :meth:`suggest` for every query.
+
+        Every query is a filename, or a tuple with the arguments to
+        :meth:`suggest`, like ``(filename, mimetype, contents)``.
+
+        """
+        suggest = self.suggest
+        return [suggest(*q) if isinstance(q, tuple) else suggest(q)
+                for q in queries]
+
+    def _get_index(self):
+        """Return the _Index used by suggest(), creating it if needed."""
+        index = self._index
+        if index is None:
+            index = self._index = _Index(self)
+        return index
+
+    def _changed(self):
+        """Called when the registry is modified, drops the index."""
+        self._index = None
+
+    _index = None
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def pop(self, *args):
+        try:
+            return super().pop(*args)
+        finally:
+            self._changed()
+
+    def popitem(self):
+        try:
+            return super().popitem()
+        finally:
+            self._changed()
+
+    def setdefault(self, key, default=None):
+        try:
+            return super().setdefault(key, default)
+        finally:
+            self._changed()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._changed()
+
     def find(self, name):
         """Find a fully qualified lexicon name for the specified name.
 
@@ -187,6 +253,78 @@ class Registry(dict):
             return lexicon_name
 
 
+class _Index:
+    """Lookup tables for Registry.suggest(), built once from a Registry.
+
+    Filename patterns without wildcards are looked up in a dictionary, as are
+    patterns like ``"*.ext"``, via the extensions of a filename. The other
+    patterns are compiled to regular expressions, and combined into one
+    regular expression to quickly skip filenames that don't match any of
+    them. The regular expressions of the guesses are precompiled.
+
+    """
+    def __init__(self, registry):
+        self.order = {name: i for i, name in enumerate(registry)}
+        self.filenames = collections.defaultdict(dict)
+        self.extensions = collections.defaultdict(dict)
+        self.mimetypes = collections.defaultdict(dict)
+        self.guesses = {}
+        patterns = []
+        for name, item in registry.items():
+            for pattern, weight in item.filenames:
+                pattern = os.path.normcase(pattern)
+                if not _glob_chars.search(pattern):
+                    d = self.filenames[pattern]
+                elif pattern.startswith("*.") and not _glob_chars.search(pattern, 1):
+                    d = self.extensions[pattern[2:]]
+                else:
+                    patterns.append((fnmatch.translate(pattern), name, weight))
+                    continue
+                _add(d, name, weight)
+            for mimetype, weight in item.mimetypes:
+                _add(self.mimetypes[mimetype], name, weight)
+            self.guesses[name] = [(re.compile(regex).search, weight)
+                                  for regex, weight in item.guesses]
+        self.patterns = [(re.compile(regex).match, name, weight)
+                         for regex, name, weight in patterns]
+        self.any_pattern = re.compile("|".join(
+            "(?:{})".format(regex) for regex, name, weight in patterns)).match \
+                if patterns else None
+
+    def filename_weights(self, filename):
+        """Return a dictionary with the highest weight per lexicon name for
+        the patterns matching the filename.
+
+        """
+        filename = os.path.normcase(filename)
+        found = {}
+        d = self.filenames.get(filename)
+        if d:
+            for name, weight in d.items():
+                _add(found, name, weight)
+        i = filename.find(".")
+        while i != -1:
+            d = self.extensions.get(filename[i+1:])
+            if d:
+                for name, weight in d.items():
+                    _add(found, name, weight)
+            i = filename.find(".", i + 1)
+        if self.any_pattern and self.any_pattern(filename):
+            for match, name, weight in self.patterns:
+                if match(filename):
+                    _add(found, name, weight)
+        return {name: weight for name, weight in found.items() if weight}
+
+
+def _add(d, name, weight):
+    """Store weight for name in dictionary d, if it is higher."""
+    if name not in d or weight > d[name]:
+        d[name] = weight
+
+
+_glob_chars = re.compile(r"[*?[]")
+
+
 # the global Registry is in the ``registry`` module variable
 registry = Registry()
 
@@ -201,23 +339,52 @@ def suggest(filename=None, mimetype=None, contents=None):
     return registry.suggest(filename, mimetype, contents)
 
 
+def suggest_many(queries):
+    """:meth:`~Registry.suggest_many` for many files from the global registry."""
+    return registry.suggest_many(queries)
+
+
 def find(name):
     """:meth:`~Registry.find` a lexicon by name from the global registry."""
     return registry.find(name)
 
 
-def root_lexicon(lexicon_name):
+def root_lexicon(lexicon_name, lazy=False):
     """Import the module and return the root lexicon.
 
     Eg, for the ``lexicon_name`` ``"parce.lang.css.Css.root"`` imports the
     ``parce.lang.css`` module and returns the ``Css.root`` lexicon.
 
+    If ``lazy`` is True, a :class:`~parce.lexicon.LazyLexicon` is returned,
+    which imports the module only when the lexicon is used for parsing. The
+    time it took to import modules is recorded, see :func:`import_times`.
+
     """
+    if lazy:
+        from parce.lexicon import LazyLexicon
+        return LazyLexicon(lexicon_name)
     module, cls, root = lexicon_name.rsplit(".", 2)
-    mod = importlib.import_module(module)
+    try:
+        mod = sys.modules[module]
+    except KeyError:
+        t = time.perf_counter()
+        mod = importlib.import_module(module)
+        _import_times[module] = time.perf_counter() - t
     return getattr(getattr(mod, cls), root)
 
 
+def import_times():
+    """Return a dictionary with the time in seconds it took to import modules.
+
+    Only modules that were imported by :func:`root_lexicon` are listed. The
+    time includes the import of the modules they import, that were not yet
+    imported.
+
+    """
+    return dict(_import_times)
+
+
+_import_times = {}
 
 
 ## register the bundled languages
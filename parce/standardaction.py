@@ -79,17 +79,25 @@ See for the full list of pre-defined standard actions :doc:`stdactions`.
 """
 
 
+import itertools
 import threading
 
 # we use a global lock for standardaction creation, it seems overkill
 # to me to equip every instance with one.
 _lock = threading.Lock()
 
+_ids = itertools.count()    # every StandardAction gets a unique integer _id
+
 _toplevel_actions = {}       # store the "root" actions
 
 
 class StandardAction:
-    """Factory for standard action singletons."""
+    """Factory for standard action singletons.
+
+    Every instance has a unique integer ``_id``, numbered from zero in order
+    of creation, which can be used to look up actions in a list.
+
+    """
     def __new__(cls, name, parent=None):
         d = parent.__dict__ if parent else _toplevel_actions
         with _lock:
@@ -99,6 +107,7 @@ class StandardAction:
                 new = d[name] = object.__new__(cls)
                 new._name = name
                 new._parent = parent
+                new._id = next(_ids)
                 return new
 
     def __getattr__(self, name):
@@ -132,3 +141,24 @@ class StandardAction:
     def __deepcopy__(self, memo):
         return self
 
+
+
+def encode_action(action):
+    """Return a picklable form of the action that can be sent to another process.
+
+    A StandardAction is encoded as its dotted name; any other action is
+    wrapped in a one-tuple. See :func:`decode_action`.
+
+    """
+    return repr(action) if isinstance(action, StandardAction) else (action,)
+
+
+def decode_action(value):
+    """Return the action for the value returned by :func:`encode_action`."""
+    if isinstance(value, tuple):
+        return value[0]
+    names = value.split('.')
+    action = StandardAction(names[0])
+    for name in names[1:]:
+        action = getattr(action, name)
+    return action
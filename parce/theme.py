@@ -88,6 +88,7 @@ import collections
 import itertools
 import functools
 import os
+import types
 
 from . import css
 from . import util
@@ -183,10 +184,33 @@ class Theme(AbstractTheme):
     @util.cached_method
     def textformat(self, action):
         """Return the TextFormat for the specified action."""
-        class_ = css_class(action)
-        e = css.Element(class_=class_, parent=css.Element(class_="parce"))
+        e = action_element(action)
         return self.TextFormat(self.style.select_element(e).properties())
 
+    def resolve_all(self, languages):
+        """Return a read-only dictionary mapping actions to their TextFormat.
+
+        All the standard actions that can be yielded by the specified
+        ``languages`` (an iterable of :class:`~parce.language.Language`
+        subclasses) and the languages they refer to are resolved at once, in
+        one traversal of the stylesheet rules. The returned mapping can't be
+        modified and can be shared between threads without locking, e.g. by a
+        formatter.
+
+        The elements of all actions are matched as children of one ``parce``
+        element, so selectors that depend on the siblings of an element (like
+        ``:first-child``) should not be used in a theme.
+
+        """
+        from .introspect import all_languages, standardactions
+        actions = set()
+        for lang in all_languages(*languages):
+            actions.update(standardactions(lang))
+        root = css.Element(class_="parce")
+        elements = {action_element(action, root): action for action in actions}
+        return types.MappingProxyType({elements[e]: self.TextFormat(style.properties())
+            for e, style in self.style.select_tree(root) if e is not root})
+
 
 class TextFormat:
     """Simple textformat that reads CSS properties and supports a subset of those.
@@ -544,3 +568,16 @@ def css_class(action):
     return repr(action).lower().replace('.', ' ')
 
 
+def action_element(action, parent=None):
+    """Return a :class:`css.Element <parce.css.Element>` for the action.
+
+    The element has the :func:`css_class` of the action and is a child of
+    ``parent``, which should be an Element with the ``parce`` class. If
+    ``parent`` is None, a new one is created.
+
+    """
+    if parent is None:
+        parent = css.Element(class_="parce")
+    return css.Element(class_=css_class(action), parent=parent)
+
+
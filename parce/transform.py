@@ -34,11 +34,18 @@ language. But I'm not yet sure how it would be specified.
 """
 
 import collections
+import concurrent.futures
+import hashlib
+import functools
+import itertools
+import operator
+import os
 import sys
 import threading
 import weakref
 
 import parce.lexer
+import parce.standardaction
 import parce.util
 
 
@@ -54,6 +61,18 @@ class Item(collections.namedtuple("Item", "name obj")):
     is_token = False
 
 
+Change = collections.namedtuple("Change", "context old new")
+"""A named tuple(context, old, new) describing a changed transform result.
+
+The ``context`` is the Context that was transformed again, ``old`` the
+previous result for that context (None if the context is new), and ``new`` the
+new result. A list of these is emitted with the ``"changed"`` event of the
+Transformer. Results are compared by identity, so a context that was
+transformed again to an equal but new object is also reported.
+
+"""
+
+
 class Items(list):
     """A list of Item and Token instances.
 
@@ -167,18 +186,36 @@ class Transformer(parce.util.Observable):
         emitted when the transformation has fully completed, with the tree
         and the resulting transformation
 
+    ``"changed"``:
+        emitted after ``"updated"`` when the tree was transformed before and
+        only the invalidated parts were transformed again; with the tree and
+        a list of :class:`Change` tuples, describing the contexts that got a
+        new result object, children before their parents. Use this to patch
+        an existing view of the result instead of reloading it.
+
     ``"finished"``:
         always emitted when transformation has quit, also when it was
         inrerrupted due to tree modification while transforming was busy;
         with the tree as argument
 
+    If you set the ``shared_cache`` attribute to a :class:`ResultCache`, the
+    results are also cached by the contents of the contexts, so the result
+    of a context that has the same lexicon and tokens as a context that was
+    transformed before (maybe in another tree or by another Transformer) is
+    reused.
+
     """
     def __init__(self):
         super().__init__()
         self._lock = threading.Lock()   # for instantiating Transforms
         self._transforms = {}
         self._cache = weakref.WeakKeyDictionary()
+        self._dirty = weakref.WeakKeyDictionary()   # invalidated node: old result
+        self._dirty_children = weakref.WeakKeyDictionary()  # node: invalidated child nodes
+        self._items = weakref.WeakKeyDictionary()   # node: (children, entries)
         self._interrupt = weakref.WeakKeyDictionary()
+        self._keys = weakref.WeakKeyDictionary()    # node: content key
+        self.shared_cache = None    #: an optional :class:`ResultCache`
 
     def transform_text(self, root_lexicon, text, pos=0):
         """Directly create an evaluated object from text using root_lexicon.
@@ -234,54 +271,459 @@ class Transformer(parce.util.Observable):
         item = get_object_item(items)
         return None if item is no_object else item.obj
 
+    def transform_text_stream(self, root_lexicon, chunks, depth=1, margin=1024):
+        """Yield evaluated items from a stream of text, using root_lexicon.
+
+        The ``chunks`` is an iterable of text strings, e.g. an open text file.
+        This method yields the contents of the contexts ``depth - 1`` levels
+        below the root lexicon, as soon as they are available: every Token,
+        and, every time a context ``depth`` levels below the root lexicon is
+        finished, an :class:`Item` with the result of its transform method.
+        Those are the items the transform method of their parent context
+        would get, so you can use that Transform to interpret the Tokens.
+        After being yielded, the items are forgotten. So memory usage is
+        proportional to the size of one context, and not to the size of the
+        full text. For example, to yield the elements of a large JSON array or
+        the lines of a JSON Lines file one by one.
+
+        The transform methods of the lexicons above ``depth`` are not called,
+        and the tokens in the lexicons more than one level above ``depth`` are
+        discarded. If ``depth`` is 0, only the Item with the transformed
+        result of the root lexicon is yielded.
+
+        The lexer state is carried over from one chunk to the next. Because
+        a token near the end of the text read so far could be different when
+        more text is appended, events that end within ``margin`` characters
+        from the end of the text read so far are lexed again, together with
+        the next chunk. So ``margin`` should be larger than the longest token
+        or lookahead the lexicons' regular expressions can match.
+
+        Text can only be committed at a token that does not change the lexicon
+        state itself, as the lexer reports a lexicon change together with the
+        token following it. In a language where every token changes the
+        lexicon, the full text is buffered.
+
+        """
+        if not root_lexicon:
+            return  # a root lexicon can be None, but then there are no children
+
+        from parce.tree import make_tokens  # local lookup is faster
+
+        curlang = root_lexicon.language
+        transform = self.get_transform(curlang)
+
+        items = Items()
+        stack = []
+        lexicon = root_lexicon
+        results = []
+
+        no_object = object()                # sentinel for missing method
+
+        def get_object_item(items):
+            """Get the object item, may update curlang and transform variables."""
+            nonlocal curlang, transform
+            if curlang is not lexicon.language:
+                curlang = lexicon.language
+                transform = self.get_transform(curlang)
+            name = lexicon.name
+            meth = getattr(transform, name, None)
+            return Item(name, meth(items)) if meth else no_object
+
+        def pop():
+            """Leave the current lexicon, storing its result if needed."""
+            nonlocal lexicon, items
+            level = len(stack)
+            item = get_object_item(items) if level >= depth else no_object
+            if level:
+                lexicon, items = stack.pop()
+            if item is not no_object:
+                if level == depth:
+                    results.append(item)
+                else:
+                    items.append(item)
+
+        def commit(e):
+            """Handle an event, storing or yielding the tokens if needed."""
+            nonlocal lexicon, items
+            if e.target:
+                for _ in range(e.target.pop, 0):
+                    pop()
+                for l in e.target.push:
+                    stack.append((lexicon, items))
+                    items = Items()
+                    lexicon = l
+            level = len(stack)
+            if level >= depth - 1:
+                tokens = make_tokens(e)
+                if offset:
+                    for t in tokens:
+                        t.pos += offset
+                (items if level >= depth else results).extend(tokens)
+
+        text = ""       # the text that is not yet committed
+        offset = 0      # the position of text in the stream
+        for chunk in itertools.chain(chunks, (None,)):
+            final = chunk is None
+            if not final:
+                text += chunk
+                if len(text) <= margin:
+                    continue
+            limit = len(text) - margin
+            lexicons = [l for l, i in stack] + [lexicon]
+            pending = []
+            pos = 0
+            for e in parce.lexer.Lexer(lexicons).events(text):
+                if pending and not e.target:
+                    # the lexer has no pending target, so the state after the
+                    # pending events is known: we can commit them
+                    for p in pending:
+                        commit(p)
+                    p, txt, action = pending[-1].lexemes[-1]
+                    pos = p + len(txt)
+                    pending.clear()
+                p, txt, action = e.lexemes[-1]
+                if not final and p + len(txt) > limit:
+                    break
+                pending.append(e)
+            if final:
+                for e in pending:
+                    commit(e)
+                # unwind
+                while stack:
+                    pop()
+                pop()
+            else:
+                text = text[pos:]
+                offset += pos
+            yield from results
+            results.clear()
+
     def transform_tree(self, tree):
         """Evaluate a tree structure."""
+        return self._transform_tree(tree, None)
+
+    def update_tree(self, tree):
+        """Incrementally evaluate a tree structure that was transformed before.
+
+        Only the contexts that were invalidated using :meth:`invalidate_node`
+        (and new contexts) are transformed again; if nothing was invalidated,
+        the cached result is returned immediately.
+
+        Returns a two-tuple(result, changes), where changes is a list of
+        :class:`Change` tuples for the contexts that got a new result object,
+        including the root context. If the transformation is interrupted, the
+        contexts that were not yet transformed remain invalidated.
+
+        """
+        if tree not in self._dirty:
+            try:
+                return self._cache[tree], []
+            except KeyError:
+                pass
+        changes = []
+        result = self._transform_tree(tree, changes)
+        if not self._interrupt[tree]:
+            old = self._dirty.pop(tree, None)
+            self._cache[tree] = result
+            if old is not result:
+                changes.append(Change(tree, old, result))
+        return result, changes
+
+    def _transform_tree(self, tree, changes):
+        """Implementation of :meth:`transform_tree` and :meth:`update_tree`.
+
+        For every transformed context, the items that were given to the
+        transform method are kept, together with the children they were
+        created from. When a context is transformed again, only the children
+        that were replaced (compared by identity) and the invalidated child
+        contexts are looked at; the other items are reused.
+
+        If ``changes`` is a list, a :class:`Change` is appended for every
+        context below the root that gets a new result.
+
+        """
         self._interrupt[tree] = False
 
         if not tree.lexicon:
             return  # a root lexicon can be None, but then there are no children
 
-        curlang = tree.lexicon.language
-        transform = self.get_transform(curlang)
+        shared = self.shared_cache
+        if shared is not None:
+            obj = shared.get(self._content_key(tree), _missing)
+            if obj is not _missing:
+                self._forget_items(tree)
+                return obj
+
+        cache = self._cache
+        dirty = self._dirty
+        interrupt = self._interrupt
+        curlang = transform = None
 
+        def get_method(context):
+            """Return the transform method for the context, may be None."""
+            nonlocal curlang, transform
+            if curlang is not context.lexicon.language:
+                curlang = context.lexicon.language
+                transform = self.get_transform(curlang)
+            return getattr(transform, context.lexicon.name, None)
+
+        def finish(context, obj):
+            """Store the result of a context below the root."""
+            old = dirty.pop(context, None)
+            if changes is not None and old is not obj:
+                changes.append(Change(context, old, obj))
+            cache[context] = obj
+
+        obj = None
         stack = []
-        node, items, i = tree, Items(), 0
-        while not self._interrupt[tree]:
-            for i in range(i, len(node)):
+        node = tree
+        entries, todo = self._entries(node)
+        while not interrupt[tree]:
+            for i in todo:
                 n = node[i]
                 if n.is_token:
-                    items.append(n)
-                else:
-                    # a context; do we have a method for it?
-                    if curlang is not n.lexicon.language:
-                        curlang = n.lexicon.language
-                        transform = self.get_transform(curlang)
-                    name = n.lexicon.name
-                    meth = getattr(transform, name, None)
-                    # don't bother going in this context is there is no method
-                    if meth:
-                        try:
-                            items.append(Item(name, self._cache[n]))
-                        except KeyError:
-                            stack.append((items, i + 1))
-                            node, items, i = n, Items(), 0
-                            break
+                    entries[i] = n
+                    continue
+                # a context; don't bother going in if there is no method
+                if not get_method(n):
+                    entries[i] = None
+                    continue
+                name = n.lexicon.name
+                try:
+                    entries[i] = Item(name, cache[n])
+                    continue
+                except KeyError:
+                    pass
+                if shared is not None:
+                    obj = shared.get(self._content_key(n), _missing)
+                    if obj is not _missing:
+                        self._forget_items(n)
+                        finish(n, obj)
+                        entries[i] = Item(name, obj)
+                        continue
+                stack.append((node, entries, todo, i))
+                node = n
+                entries, todo = self._entries(node)
+                break
             else:
-                if curlang is not node.lexicon.language:
-                    curlang = node.lexicon.language
-                    transform = self.get_transform(curlang)
-                name = node.lexicon.name
-                meth = getattr(transform, name, None)
-                obj = meth(items) if meth else None
-                if stack:
-                    self._cache[node] = obj
-                    items, i = stack.pop()
-                    items.append(Item(name, obj))
-                    node = node.parent
-                else:
+                meth = get_method(node)
+                obj = meth(Items(filter(_not_none, entries))) if meth else None
+                self._items[node] = list(node), entries
+                self._dirty_children.pop(node, None)
+                if shared is not None:
+                    shared.set(self._content_key(node), obj)
+                if not stack:
                     break
+                finish(node, obj)
+                name = node.lexicon.name
+                node, entries, todo, i = stack.pop()
+                entries[i] = Item(name, obj)
         return obj
 
+    def _forget_items(self, context):
+        """Forget the kept items and invalidated children of the context.
+
+        Called when the result of a context is taken from the shared cache, so
+        the kept items don't describe the current children anymore. The next
+        time, all children are looked at.
+
+        """
+        self._items.pop(context, None)
+        self._dirty_children.pop(context, None)
+
+    def _entries(self, context):
+        """Return a two-tuple(entries, todo) to transform the context.
+
+        The ``entries`` list has an item (a Token, an Item or None) for every
+        child of the context, those that were kept from the previous time are
+        filled in. ``todo`` is an iterator over the indices of the children
+        that need to be looked at: the replaced children and the invalidated
+        child contexts.
+
+        """
+        state = self._items.get(context)
+        if state is None:
+            return [None] * len(context), iter(range(len(context)))
+        children, entries = state
+        n, m = len(context), len(children)
+        size = min(n, m)
+        # find the number of unchanged children at the start and at the end
+        count = itertools.count()
+        lo = next(itertools.compress(count, map(operator.is_not, context, children)), size)
+        count = itertools.count()
+        hi = next(itertools.compress(count, map(operator.is_not, reversed(context), reversed(children))), size)
+        hi = n - min(hi, size - lo)
+        entries = entries[:lo] + [None] * (hi - lo) + entries[m - n + hi:]
+        before, after = [], []
+        for child in self._dirty_children.get(context, ()):
+            # a removed child can still refer to its old parent
+            i = child.parent_index() if child.parent is context else n
+            if i < n and context[i] is child:
+                if i < lo:
+                    before.append(i)
+                elif i >= hi:
+                    after.append(i)
+        return entries, itertools.chain(sorted(before), range(lo, hi), sorted(after))
+
+    def _content_key(self, context):
+        """Return a key for the shared cache, describing the context's contents.
+
+        The key is a tuple(lexicon, digest), where the digest is computed from
+        the text and action of all tokens and the lexicons of all contexts in
+        the context, together with the Transform class used for each lexicon.
+        The keys are cached until the context is invalidated.
+
+        """
+        keys = self._keys
+        key = keys.get(context)
+        if key:
+            return key
+
+        def prefixed(s):
+            """Return the length-prefixed string as bytes."""
+            b = s.encode("utf-8", "surrogatepass")
+            return b"%d:%b" % (len(b), b)
+
+        names = {}
+        def name(action):
+            """Return the length-prefixed repr of the action as bytes."""
+            try:
+                return names[action]
+            except KeyError:
+                b = names[action] = prefixed(repr(action))
+                return b
+
+        lexicons = {}
+        def new(context):
+            """Return a new hash object for the context's lexicon and Transform."""
+            lexicon = context.lexicon
+            try:
+                b = lexicons[lexicon]
+            except KeyError:
+                lang = lexicon.language
+                tf = type(self.get_transform(lang))
+                s = "{}.{}.{}".format(lang.__module__, lang.__qualname__, lexicon.name)
+                if lexicon.arg is not None:
+                    s += "({!r})".format(lexicon.arg)
+                b = lexicons[lexicon] = prefixed(s) + prefixed(tf.__module__ + "." + tf.__qualname__)
+            return hashlib.blake2b(b, digest_size=16)
+
+        stack = []
+        node, i, h = context, 0, new(context)
+        while True:
+            for i in range(i, len(node)):
+                n = node[i]
+                if n.is_token:
+                    text = n.text.encode("utf-8", "surrogatepass")
+                    h.update(b"T%d:%b%b" % (len(text), text, name(n.action)))
+                else:
+                    key = keys.get(n)
+                    if not key:
+                        stack.append((node, i + 1, h))
+                        node, i, h = n, 0, new(n)
+                        break
+                    h.update(b"C" + key[1])
+            else:
+                key = keys[node] = (node.lexicon, h.digest())
+                if not stack:
+                    return key
+                node, i, h = stack.pop()
+                h.update(b"C" + key[1])
+
+    def transform_tree_parallel(self, tree, executor, depth=1):
+        """Evaluate a tree structure, transforming subtrees concurrently.
+
+        The contexts ``depth`` levels below the root are transformed as
+        separate jobs using the ``executor``, a
+        :class:`concurrent.futures.Executor`. Then the rest of the tree is
+        transformed as usual, reusing the results of the jobs. This is useful
+        for large trees with many independent subtrees, e.g. the items of a
+        large JSON array.
+
+        If the executor is a :class:`~concurrent.futures.ProcessPoolExecutor`,
+        the subtrees are sent to the worker processes in a compact picklable
+        form and rebuilt there, so the Transforms must be picklable, and the
+        transform methods can't reach the nodes outside their subtree. Results
+        of contexts inside the subtrees are not cached in that case.
+
+        Otherwise, every job uses a copy of the Transformer with its own
+        state, which is merged back when the job is done, so the jobs don't
+        need locking. The Transforms are shared by the jobs.
+
+        """
+        if not tree.lexicon:
+            return  # a root lexicon can be None, but then there are no children
+
+        # find the contexts to transform separately
+        nodes = [tree]
+        for _ in range(depth):
+            nodes = [n for node in nodes for n in node
+                if n.is_context and n not in self._cache
+                    and getattr(self.get_transform(n.lexicon.language), n.lexicon.name, None)]
+
+        if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+            def submit(nodes):
+                datas = []
+                transforms = {}
+                for node in nodes:
+                    data, languages = _compact_tree(node)
+                    datas.append(data)
+                    for lang in languages:
+                        transforms[lang] = self.get_transform(lang)
+                return executor.submit(_transform_compact_trees, datas, transforms)
+
+            def collect(future):
+                return future.result()
+        else:
+            def submit(nodes):
+                def job():
+                    worker = self._worker()
+                    return [worker._transform_tree(n, None) for n in nodes], worker
+                return executor.submit(job)
+
+            def collect(future):
+                objs, worker = future.result()
+                self._merge(worker)
+                return objs
+
+        # divide the nodes in batches, to keep the overhead per job low
+        count = min(len(nodes), 4 * (os.cpu_count() or 1))
+        batches = [nodes[i::count] for i in range(count)]
+        futures = [(batch, submit(batch)) for batch in batches]
+        for batch, future in futures:
+            for node in batch:
+                self._dirty.pop(node, None)
+                self._forget_items(node)
+            for node, obj in zip(batch, collect(future)):
+                self._cache[node] = obj
+        return self.transform_tree(tree)
+
+    def _worker(self):
+        """Return a copy of the Transformer, to transform subtrees in another thread.
+
+        The copy shares the Transforms, but has its own state, so it can
+        transform without locking. Merge the state back using :meth:`_merge`.
+
+        """
+        worker = object.__new__(type(self))
+        worker.__dict__.update(self.__dict__)
+        worker._cache = weakref.WeakKeyDictionary()
+        worker._dirty = weakref.WeakKeyDictionary()
+        worker._dirty_children = weakref.WeakKeyDictionary()
+        worker._items = weakref.WeakKeyDictionary()
+        worker._interrupt = weakref.WeakKeyDictionary()
+        worker._keys = weakref.WeakKeyDictionary()
+        return worker
+
+    def _merge(self, worker):
+        """Take over the results of a Transformer returned by :meth:`_worker`."""
+        for node in worker._cache:
+            self._dirty.pop(node, None)
+            self._forget_items(node)
+        self._cache.update(worker._cache)
+        self._items.update(worker._items)
+        self._keys.update(worker._keys)
+
     def build(self, tree):
         """Called when a tree needs to be transformed.
 
@@ -303,11 +745,13 @@ class Transformer(parce.util.Observable):
         """
         self.emit("started", tree)
         yield "build"
-        result = self.transform_tree(tree)
+        incremental = tree in self._cache
+        result, changes = self.update_tree(tree)
         yield "replace"
         if not self._interrupt[tree]:
-            self._cache[tree] = result
             self.emit("updated", tree, result)
+            if incremental and changes:
+                self.emit("changed", tree, changes)
         del self._interrupt[tree]
         self.emit("finished", tree)
         yield "done"
@@ -330,12 +774,23 @@ class Transformer(parce.util.Observable):
         """Remove the transform results for this node and its ancestors
         from our cache.
 
-        Does not throw away the result for the root context.
+        The node and its ancestors are marked dirty, so :meth:`update_tree`
+        only transforms those again. Does not throw away the result for the
+        root context.
 
         """
+        dirty = self._dirty
+        dirty_children = self._dirty_children
+        keys = self._keys
         while node.parent:
-            del self._cache[node]
+            if node not in dirty:
+                dirty[node] = self._cache.pop(node, None)
+            keys.pop(node, None)
+            dirty_children.setdefault(node.parent, set()).add(node)
             node = node.parent
+        if node not in dirty:
+            dirty[node] = self._cache.get(node)
+        keys.pop(node, None)
 
     def connect_treebuilder(self, builder):
         """Connect to the events of the TreeBuilder.
@@ -385,6 +840,8 @@ class Transformer(parce.util.Observable):
     def add_transform(self, language, transform):
         """Add a Transform instance for the specified language."""
         self._transforms[language] = transform
+        self._keys.clear()  # the content keys include the Transform
+        self._items.clear()
 
     def find_transform(self, language):
         """If no Transform was added, try to find a predefined one.
@@ -402,37 +859,238 @@ class Transformer(parce.util.Observable):
             return tf()
 
 
+class ResultCache:
+    """A cache for transform results, keyed by the contents of the contexts.
+
+    Set an instance as the ``shared_cache`` attribute of one or more
+    Transformers, to reuse the result of contexts with the same lexicon, the
+    same Transform class and the same tokens (text and action), anywhere in
+    any tree. This is useful when many documents share identical fragments.
+
+    At most ``maxsize`` results are kept; when more results are added, the
+    least recently used results are discarded.
+
+    The ``hits`` and ``misses`` attributes count the number of results that
+    were found in the cache or not, respectively.
+
+    Note that the same result object is returned for identical contexts, so
+    don't modify a transform result in place, and don't use a shared cache
+    with Transforms that store tokens or their positions in the result.
+
+    """
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.hits = 0       #: the number of results found in the cache
+        self.misses = 0     #: the number of results not found in the cache
+        self._lock = threading.Lock()
+        self._results = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._results)
+
+    def get(self, key, default=None):
+        """Return the result for the key, or ``default`` if not present."""
+        with self._lock:
+            try:
+                obj = self._results[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._results.move_to_end(key)
+            self.hits += 1
+            return obj
+
+    def set(self, key, obj):
+        """Store the result for the key, discarding old results if needed."""
+        with self._lock:
+            results = self._results
+            results[key] = obj
+            results.move_to_end(key)
+            while len(results) > self.maxsize:
+                results.popitem(False)
+
+    def clear(self):
+        """Clear the cache. The hit and miss counters are not reset."""
+        with self._lock:
+            self._results.clear()
+
+
 class BackgroundTransformer(Transformer):
-    """A Transformer that does its job in a background thread."""
-    def __init__(self):
+    """A Transformer that does its job in the background, using an Executor.
+
+    The ``executor`` is a :class:`concurrent.futures.Executor`; if not given,
+    a :class:`~concurrent.futures.ThreadPoolExecutor` is created. Using one
+    executor for many BackgroundTransformers or trees, the number of threads
+    or processes doing transformations can be limited.
+
+    Only one job transforms a tree at a time: when :meth:`build` is called
+    again while a job for the same tree is waiting, the job is reused; and
+    when the job is already running, it transforms the tree again after
+    finishing (or being interrupted by a tree modification).
+
+    """
+    def __init__(self, executor=None):
         super().__init__()
-        self._jobs = {}
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor()
+        self.executor = executor
+        self._jobs = {}         # tree: Future
+        self._rerun = set()     # trees that need to be transformed again
+        self._jobs_lock = threading.Lock()
 
     def build(self, tree):
-        """Reimplemented to build the transformation in a background thread.
+        """Reimplemented to build the transformation in the background.
 
-        This method starts a background thread performing the transformation
-        and returns immediately.
+        This method submits a job performing the transformation to the
+        executor, and returns immediately. Returns a
+        :class:`~concurrent.futures.Future` that yields the transformed
+        result of the tree.
 
         """
         def job():
-            for stage in self.process(tree):
-                pass
-            del self._jobs[tree]
-        job = self._jobs[tree] = threading.Thread(target=job)
-        job.start()
+            try:
+                while True:
+                    for stage in self.process(tree):
+                        pass
+                    with self._jobs_lock:
+                        if tree not in self._rerun:
+                            del self._jobs[tree]
+                            return self.result(tree)
+                        self._rerun.remove(tree)
+            except BaseException:
+                with self._jobs_lock:
+                    self._jobs.pop(tree, None)
+                    self._rerun.discard(tree)
+                raise
+
+        with self._jobs_lock:
+            future = self._jobs.get(tree)
+            if future:
+                if future.running():
+                    self._rerun.add(tree)
+            else:
+                future = self._jobs[tree] = self.executor.submit(job)
+            return future
+
+    def future(self, tree):
+        """Return the Future of the job transforming the tree, if busy.
 
-    def wait(self, tree):
-        """Wait for completion of the transformation of the tree if busy."""
-        job = self._jobs.get(tree)
-        if job:
-            job.wait()
+        Returns None if no job is busy for the tree.
+
+        """
+        return self._jobs.get(tree)
+
+    def wait(self, tree, timeout=None):
+        """Wait for completion of the transformation of the tree if busy.
+
+        If ``timeout`` is given, waits at most ``timeout`` seconds. Returns
+        True if no job is busy for the tree anymore.
+
+        """
+        future = self._jobs.get(tree)
+        if future:
+            concurrent.futures.wait((future,), timeout)
+            return future.done()
+        return True
+
+    async def wait_async(self, tree):
+        """Wait in an asyncio event loop for the transformation of the tree.
+
+        Returns the transformed result of the tree. For example::
+
+            result = await transformer.wait_async(tree)
+
+        """
+        import asyncio
+        future = self._jobs.get(tree)
+        if future:
+            return await asyncio.wrap_future(future)
+        return self.result(tree)
 
     def busy(self, tree):
         """Return True if a job transforming the tree is busy."""
         return tree in self._jobs
 
 
+_missing = object()     # sentinel for missing results in a ResultCache
+_not_none = functools.partial(operator.is_not, None)
+
+
+def _compact_tree(context):
+    """Return a picklable compact form of the context, and the languages used.
+
+    Every context becomes a tuple(language, lexicon name, lexicon argument,
+    children); every token a tuple(pos, text, action, group). Actions are
+    encoded using :func:`~parce.standardaction.encode_action`. See
+    :func:`_restore_tree`.
+
+    """
+    languages = set()
+    action_names = {}
+
+    def action_name(action):
+        try:
+            return action_names[action]
+        except KeyError:
+            name = action_names[action] = parce.standardaction.encode_action(action)
+            return name
+
+    def compact(context):
+        lexicon = context.lexicon
+        languages.add(lexicon.language)
+        children = [
+            compact(n) if n.is_context else
+            (n.pos, n.text, action_name(n.action), getattr(n, "group", None))
+            for n in context]
+        return lexicon.language, lexicon.name, lexicon.arg, children
+
+    return compact(context), languages
+
+
+def _restore_tree(data, parent=None):
+    """Rebuild a Context from the compact form returned by :func:`_compact_tree`."""
+    from parce.tree import Context, GroupToken, Token
+    actions = {}
+
+    def action(name):
+        try:
+            return actions[name]
+        except KeyError:
+            a = actions[name] = parce.standardaction.decode_action(name)
+            return a
+
+    def restore(data, parent):
+        language, name, arg, children = data
+        lexicon = getattr(language, name)
+        if arg is not None:
+            lexicon = lexicon(arg)
+        context = Context(lexicon, parent)
+        for c in children:
+            if isinstance(c[0], int):
+                pos, text, a, group = c
+                if group is None:
+                    context.append(Token(context, pos, text, action(a)))
+                else:
+                    context.append(GroupToken(group, context, pos, text, action(a)))
+            else:
+                context.append(restore(c, context))
+        return context
+
+    return restore(data, parent)
+
+
+def _transform_compact_trees(datas, transforms):
+    """Transform compact trees in a worker process, using the Transforms.
+
+    Returns the list of results.
+
+    """
+    t = Transformer()
+    for language, transform in transforms.items():
+        t.add_transform(language, transform)
+    return [t.transform_tree(_restore_tree(data)) for data in datas]
+
+
 def transform_tree(tree, transform=None):
     """Convenience function that transforms tree using Transform.
 
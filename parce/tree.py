@@ -923,6 +923,26 @@ class Context(list, Node):
         for context, slice_ in self.context_slices(start, end):
             yield from util.tokens(context[slice_])
 
+    def query_range(self, start=0, end=None):
+        """Query the nodes that overlap the text range start→end.
+
+        Like ``query.all``, this yields this context and all its descendants,
+        but only the nodes overlapping the range. Using bisection, only those
+        nodes are visited, so querying a small range of a large tree is fast.
+        All query methods can be used on the result, e.g.::
+
+            tree.query_range(1000, 2000).action(Comment)
+
+        Note that the first and last nodes may extend beyond the range; use
+        :meth:`~parce.query.Query.in_range` to keep only the nodes that fall
+        completely inside it.
+
+        """
+        def gen():
+            yield from query._all_range(self, start,
+                self.end if end is None else end)
+        return query.Query(gen)
+
     def context_slices(self, start=0, end=None):
         """Yield (context, slice) tuples to yield tokens from.
 
@@ -49,16 +49,19 @@ import operator
 import threading
 
 from parce.lexer import Lexer
+from parce.lexicon import resolve_lexicon
 from parce.util import Observable, tokens
 from parce.target import TargetFactory
 from parce.tree import Context, make_tokens
 from parce.treebuilderutil import (
-    BuildResult, ReplaceResult, Changes, get_prepared_lexer, new_tree)
+    BuildResult, ReplaceResult, Changes, get_prepared_lexer, new_tree,
+    tail_tokens)
 
 
 def build_tree(root_lexicon, text, pos=0):
     """Build and return a tree in one go."""
     from parce.tree import Context, make_tokens # local is faster
+    root_lexicon = resolve_lexicon(root_lexicon)
     root = context = Context(root_lexicon, None)
     if root_lexicon:
         lexer = Lexer([root_lexicon])
@@ -163,7 +166,7 @@ class TreeBuilder(Observable):
 
     def __init__(self, root_lexicon=None):
         super().__init__()
-        self.root = Context(root_lexicon, None)
+        self.root = Context(resolve_lexicon(root_lexicon), None)
         self.busy = False
         self.changes = []
 
@@ -203,6 +206,7 @@ class TreeBuilder(Observable):
         """
         if added is None:
             added = len(text) - start
+        root_lexicon = resolve_lexicon(root_lexicon)
         self.lock(True)
         self.changes.append((text, root_lexicon, start, removed, added))
         self.lock(False)
@@ -210,7 +214,31 @@ class TreeBuilder(Observable):
             self.busy = True
             self.start_processing()
 
-    def build_new_tree(self, text, root_lexicon, start, removed, added):
+    def rebuild_ranges(self, text, ranges):
+        """Tokenize multiple modified parts of the text again and update the tree.
+
+        The ``text`` is the entire text, and ``ranges`` is a list of disjoint
+        (start, removed, added) tuples, like the list returned by
+        :meth:`Document.changed_ranges()
+        <parce.document.AbstractDocument.changed_ranges>`. The ranges are
+        sorted, and every start position already takes the previous ranges
+        into account.
+
+        Every range is retokenized separately, so the tokens in between the
+        ranges are reused if possible, instead of retokenizing all text from
+        the first to the last range.
+
+        """
+        if ranges:
+            self.lock(True)
+            for start, removed, added in ranges:
+                self.changes.append((text, False, start, removed, added))
+            self.lock(False)
+            if not self.busy:
+                self.busy = True
+                self.start_processing()
+
+    def build_new_tree(self, text, root_lexicon, start, removed, added, pending=None):
         """Build a new tree without yet modifying the current tree.
 
         Tokens from the current tree are reused as much as possible. From
@@ -236,6 +264,13 @@ class TreeBuilder(Observable):
         ``added``
             The number of added characters.
 
+        ``pending``
+            An optional list of (start, removed, added) tuples, denoting
+            other changes after this change, that are not yet processed. Old
+            tokens inside those regions are never reused. If the new tokens
+            extend past a pending change, that change is handled as well and
+            removed from the list, so the list is modified in place.
+
         Returns a ``Result`` five-tuple with ``tree``, ``start``, ``end``,
         ``offset`` and ``lexicons`` values. The ``start`` and ``end`` are the
         insert positions in the old tree.
@@ -257,6 +292,8 @@ class TreeBuilder(Observable):
 
         if root_lexicon is not False:
             start, removed, added = 0, 0, len(text)
+            if pending:
+                pending.clear()
         else:
             root_lexicon = self.root.lexicon
 
@@ -267,6 +304,8 @@ class TreeBuilder(Observable):
         offset = added - removed
 
         if not root_lexicon:
+            if pending:
+                pending.clear()
             return BuildResult(Context(root_lexicon, None), start, start + added, 0, [])
 
         # If there remains text after the modified part,
@@ -276,8 +315,7 @@ class TreeBuilder(Observable):
             # find the first token after the modified part
             tail_token = self.root.find_token_after(end)
             if tail_token:
-                tail_gen = ((t, t.pos) for t in tail_token.forward_including()
-                        if not t.group and not (t.is_first() and t.parent.lexicon.consume))
+                tail_gen = tail_tokens(tail_token, offset, pending)
                 for tail_token, tail_pos in tail_gen:
                     tail = True
                     break
@@ -291,11 +329,10 @@ class TreeBuilder(Observable):
                 result = get_prepared_lexer(tree, text, start)
                 if result:
                     lexer, events, tokens = result
-                    t = tokens[0]
+                    t = tokens[-1]
                     context = t.parent
                     for p, i in t.ancestors_with_index():
                         del p[i+1:]
-                    del context[-1]
                 else:
                     tree = None
             # find insertion spot in old tree
@@ -334,8 +371,14 @@ class TreeBuilder(Observable):
                             tail = False
                     if pos == tail_pos and tokens[0].equals(tail_token) and \
                             (context or not context.lexicon.consume) :
-                        # we can reuse the tail from tail_pos
-                        return BuildResult(tree, lowest_start, tail_pos, offset, None)
+                        # we can reuse the tail from tail_token
+                        if pending:
+                            # remove the pending changes we handled
+                            pos = tokens[0].pos
+                            while pending and pending[0][0] + pending[0][2] <= pos:
+                                del pending[0]
+                        offset += tail_pos - tail_token.pos
+                        return BuildResult(tree, lowest_start, tail_token.pos, offset, None)
                 context.extend(tokens)
                 if changes:
                     # handle changes
@@ -351,10 +394,17 @@ class TreeBuilder(Observable):
                             start = 0
                             tail = False
                             tree = None
+                            if pending:
+                                pending.clear()
 
                         elif tail:
                             # reuse old tail?
                             new_tail_pos = start + c.added
+                            if pending:
+                                # handle all pending changes now
+                                s, r, a = pending[-1]
+                                new_tail_pos = max(new_tail_pos, c.new_position(s + a))
+                                pending.clear()
                             if new_tail_pos >= len(text):
                                 tail = False
                             else:
@@ -382,6 +432,8 @@ class TreeBuilder(Observable):
                         peek = 0
             else:
                 # we ran till the end, also return the open lexicons
+                if pending:
+                    pending.clear()
                 return BuildResult(tree, lowest_start, len(text), 0, lexer.lexicons[1:])
         raise RuntimeError("shouldn't come here")
 
@@ -609,16 +661,31 @@ class TreeBuilder(Observable):
         while c and c.has_changes():
             self.lock(False)
             yield "build"
-            result = self.build_new_tree(c.text, c.root_lexicon, c.start, c.removed, c.added)
+            # handle disjoint changed regions one by one
+            pending = c.islands[1:] if c.root_lexicon is False else []
+            if pending:
+                s, removed, added = c.islands[0]
+            else:
+                s, removed, added = c.start, c.removed, c.added
+            result = self.build_new_tree(c.text, c.root_lexicon, s, removed, added, pending)
             yield "replace"
             self.emit("replace")
             r = self.replace_tree(result)
-            start = r.start if start == -1 else min (start, r.start)
-            end = r.end if end == -1 else max(c.new_position(end), r.end)
+            start = r.start if start == -1 else min(start, r.start)
+            end = max(end, r.end)
             if r.lexicons is not None:
                 lexicons = r.lexicons
             self.lock(True)
-            c = self.get_changes()
+            new = self.get_changes()
+            end = new.new_position(end)
+            if pending:
+                # merge the new changes with the remaining regions
+                text, c = c.text, Changes()
+                for island in pending:
+                    c.add(text, False, *island)
+                c.merge(new)
+            else:
+                c = new
         yield "finish"
         if start != -1:
             self.start = start
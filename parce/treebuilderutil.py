@@ -46,8 +46,12 @@ class Changes:
     :meth:`~parce.treebuilder.TreeBuilder.get_changes()`. Calling
     :meth:`add()` merges new changes with the existing changes.
 
+    The changed regions are kept in the ``islands`` attribute, a sorted list
+    of disjoint (start, removed, added) tuples. The ``start``, ``removed``
+    and ``added`` attributes describe the region encompassing all islands.
+
     """
-    __slots__ = "text", "root_lexicon", "start", "removed", "added"
+    __slots__ = "text", "root_lexicon", "start", "removed", "added", "islands"
 
     def __init__(self):
         self.text = ""
@@ -55,6 +59,7 @@ class Changes:
         self.start = -1          # meaning no text is altered
         self.removed = 0
         self.added = 0
+        self.islands = []
 
     def __repr__(self):
         changes = []
@@ -62,6 +67,8 @@ class Changes:
             changes.append("root_lexicon: {}".format(self.root_lexicon))
         if self.start != -1:
             changes.append("text: {} -{} +{}".format(self.start, self.removed, self.added))
+            if len(self.islands) > 1:
+                changes.append("{} islands".format(len(self.islands)))
         if not changes:
             changes.append("(no changes)")
         return "<Changes {}>".format(', '.join(changes))
@@ -72,6 +79,9 @@ class Changes:
         If added and removed are not given, all text after start is
         considered to be replaced.
 
+        The new change is merged with the islands it overlaps or touches;
+        other islands are kept separate.
+
         """
         if root_lexicon != False:
             self.root_lexicon = root_lexicon
@@ -80,27 +90,44 @@ class Changes:
         if added is None:
             added = len(text) - start
         self.text = text
-        if self.start == -1:
-            # there were no previous changes
-            self.start = start
-            self.removed = removed
-            self.added = added
-            return
-        # determine the offset for removed and added
-        if start + removed < self.start:
-            offset = self.start - start - removed
-        elif start > self.start + self.added:
-            offset = start - self.start - self.added
-        else:
-            offset = 0
-        # determine which part of removed falls inside existing changes
-        start = max(start, self.start)
-        end = min(start + removed, self.start + self.added)
-        offset -= max(0, end - start)
-        # set the new values
-        self.start = min(self.start, start)
-        self.removed += removed + offset
-        self.added += added + offset
+        end = start + removed
+        islands = self.islands
+        # skip the islands that end before the new change
+        i = 0
+        z = len(islands)
+        while i < z and islands[i][0] + islands[i][2] < start:
+            i += 1
+        # merge the islands that overlap or touch the new change
+        j = i
+        lo, hi, delta = start, end, 0
+        while j < z and islands[j][0] <= end:
+            s, r, a = islands[j]
+            lo = min(lo, s)
+            hi = max(hi, s + a)
+            delta += a - r
+            j += 1
+        offset = added - removed
+        islands[i:j] = [(lo, hi - lo - delta, hi - lo + offset)]
+        # move the islands after the new change
+        for k in range(i + 1, len(islands)):
+            s, r, a = islands[k]
+            islands[k] = (s + offset, r, a)
+        # set the encompassing region
+        self.start = islands[0][0]
+        s, r, a = islands[-1]
+        self.added = s + a - self.start
+        self.removed = self.added - sum(a - r for s, r, a in islands)
+
+    def merge(self, changes):
+        """Merge the islands of another Changes object, that contains newer
+        changes, with the existing changes.
+
+        """
+        for start, removed, added in changes.islands:
+            self.add(changes.text, False, start, removed, added)
+        if changes.root_lexicon != False:
+            self.root_lexicon = changes.root_lexicon
+            self.text = changes.text
 
     def has_changes(self):
         """Return True when there are actually changes."""
@@ -108,11 +135,15 @@ class Changes:
 
     def new_position(self, pos):
         """Return how the current changes would affect an older start."""
-        if pos < self.start:
-            return pos
-        elif pos < self.start + self.removed:
-            return self.start + self.added
-        return pos - self.removed + self.added
+        offset = 0
+        for start, removed, added in self.islands:
+            old_start = start - offset
+            if pos < old_start:
+                break
+            elif pos < old_start + removed:
+                return start + added
+            offset += added - removed
+        return pos + offset
 
 
 def get_prepared_lexer(tree, text, start):
@@ -244,6 +275,39 @@ def get_lexer(token):
     return Lexer(lexicons)
 
 
+def tail_tokens(token, offset, pending=None):
+    """Yield (token, pos) tuples for tokens that may be reused as tail.
+
+    Starts with the specified token, which is in the old tree. The ``offset``
+    is the position change caused by the current change. Tokens that are not
+    the first of a group or that are the first token of a context with a
+    consuming lexicon are skipped.
+
+    If there are ``pending`` changes (a list of (start, removed, added)
+    tuples in the coordinates of the new text), tokens inside their regions
+    are skipped, and the yielded pos is adjusted for the pending changes that
+    precede the token, so that ``pos + offset`` is the position of the token in
+    the new text.
+
+    """
+    islands = []
+    if pending:
+        # the regions of the pending changes in the old tree
+        for start, removed, added in pending:
+            islands.append((start - offset, removed, added - removed))
+            offset += added - removed
+    islands.reverse()   # so we can pop off the first
+    extra = 0
+    for t in token.forward_including():
+        if t.group or (t.is_first() and t.parent.lexicon.consume):
+            continue
+        while islands and islands[-1][0] + islands[-1][1] <= t.pos:
+            extra += islands.pop()[2]
+        if islands and t.end > islands[-1][0]:
+            continue    # in a pending region
+        yield t, t.pos + extra
+
+
 def new_tree(token):
     """Return an empty context (and its root) with the same ancestry as the token's."""
     c = n = context = Context(token.parent.lexicon, None)
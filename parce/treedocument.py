@@ -90,10 +90,15 @@ class TreeDocumentMixin:
         b = self.builder()
         return b.start, b.end
 
-    def contents_changed(self, start, removed, added):
-        """Called after modification of the text, retokenizes the modified part."""
-        self.builder().rebuild(self.text(), False, start, removed, added)
-        super().contents_changed(start, removed, added)
+    def ranges_changed(self, ranges):
+        """Called after modification of the text, retokenizes the modified parts.
+
+        Every disjoint range is retokenized separately, so the tokens in
+        between are reused.
+
+        """
+        self.builder().rebuild_ranges(self.text(), ranges)
+        super().ranges_changed(ranges)
 
     def token(self, pos):
         """Returns the token at the specified position, in an intuitive way.
@@ -18,21 +18,36 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
+import bisect
 import collections
+import itertools
 import re
 import reprlib
+import time
+
+try:
+    import re._parser as sre_parse          # Python >= 3.11
+    import re._constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
 
 import parce
 from .lexicon import LexiconDescriptor, Lexicon
 from .ruleitem import variations, a_number
 
 
-def validate_language(lang):
+def validate_language(lang, budget=0):
     """Validate all lexicons in this language.
 
     Errors and warnings are printed to stdout. If there are errors,
     this function returns False, otherwise True.
 
+    If a ``budget`` (in seconds) is given, the rules are also fuzzed with
+    generated input to find slow patterns, see
+    :meth:`LexiconValidator.check_performance`. The budget is divided over
+    the lexicons.
+
     """
 
     lexicons = []
@@ -47,6 +62,9 @@ def validate_language(lang):
         v.validate()
         errors.update(v.errors)
         warnings.update(v.warnings)
+        if budget:
+            v.check_performance(budget / len(lexicons))
+            warnings.update(v.warnings)
     for warning in warnings:
         print(warning)
     for error in errors:
@@ -54,6 +72,17 @@ def validate_language(lang):
     return not errors
 
 
+class RuleTiming(collections.namedtuple("RuleTiming", "rule pattern throughput text")):
+    """A named tuple(rule, pattern, throughput, text) describing the slowest
+    input that was found for a rule.
+
+    ``rule`` is the rule number (starting with 1), ``throughput`` is the
+    number of characters of the ``text`` that were matched per second.
+
+    """
+    __slots__ = ()
+
+
 class LexiconValidator:
 
     def __init__(self, lexicon):
@@ -106,6 +135,10 @@ class LexiconValidator:
                     self.warning("rule #{}: pattern is None; rule will be skipped".format(n))
                 else:
                     self.validate_pattern(pattern, n)
+                    if not any(path[1:] for path in variations(rule)):
+                        # a pattern without target that matches empty text
+                        # is tried again and again without any result
+                        self.check_empty_match(pattern, n)
                     if pattern in patterns:
                         self.warning("rule #{0}: repeated pattern {1}; will be skipped".format(n, reprlib.repr(pattern)))
                     patterns.add(pattern)
@@ -116,7 +149,15 @@ class LexiconValidator:
         return not self.errors
 
     def validate_pattern(self, pattern, n):
-        """Validate a regular expression pattern."""
+        """Validate a regular expression pattern.
+
+        Besides errors, warns for constructs that can cause catastrophic
+        backtracking: nested quantifiers like ``(a+)+``, alternatives that
+        can start with the same character inside a repeat, like
+        ``(\\w|\\d)*``, and repeats that can end with the characters they
+        start with, like ``(_\\w+)*``.
+
+        """
         try:
             rx = re.compile(pattern, self.lexicon.re_flags)
         except (TypeError, re.error) as e:
@@ -124,6 +165,82 @@ class LexiconValidator:
         else:
             if rx.match(''):
                 self.warning("rule #{0}: pattern {1} matches the empty string".format(n, repr(pattern)))
+            risks = _backtracking_risks(sre_parse.parse(pattern, self.lexicon.re_flags)) \
+                if isinstance(pattern, str) else ()
+            for msg in risks:
+                self.warning("rule #{0}: pattern {1} has {2}; may backtrack heavily".format(n, reprlib.repr(pattern), msg))
+
+    def check_empty_match(self, pattern, n):
+        """Warn if the pattern matches empty text somewhere in a sample text.
+
+        Such a rule, if it has no target, yields no tokens and changes no
+        state, but still is matched at many positions.
+
+        """
+        try:
+            rx = re.compile(pattern, self.lexicon.re_flags)
+        except (TypeError, re.error):
+            return  # already reported by validate_pattern()
+        if not rx.match(''):
+            for m in rx.finditer(_SAMPLE_TEXT):
+                if m.start() == m.end():
+                    self.warning("rule #{0}: pattern {1} matches empty text "
+                        "at some positions".format(n, reprlib.repr(pattern)))
+                    break
+
+    def check_performance(self, budget=1.0, max_length=10000, min_throughput=100000):
+        """Match every pattern rule on generated input, to find slow patterns.
+
+        For every rule, texts are generated from the characters and literal
+        strings in the pattern, repeated more and more times, until they
+        reach ``max_length`` or the rule's share of the ``budget`` (in
+        seconds) is used. A text ends with a character the pattern does not
+        expect, which makes a backtracking pattern try all its alternatives.
+        The pattern is matched at the start of the text, like the lexer does
+        at every position. The budget is not a hard limit; one match can't be
+        interrupted.
+
+        Returns a list of :class:`RuleTiming` tuples, the slowest rule first.
+        A warning is added for every rule that handled less than
+        ``min_throughput`` characters per second.
+
+        """
+        rules = []
+        for n, rule in enumerate(self.lexicon.rules, 1):
+            pattern = rule[0] if isinstance(rule, (tuple, list)) and rule else None
+            if isinstance(pattern, str):
+                try:
+                    rx = re.compile(pattern, self.lexicon.re_flags)
+                except re.error:
+                    continue
+                rules.append((n, pattern, rx))
+        timings = []
+        for n, pattern, rx in rules:
+            share = budget / len(rules)
+            deadline = time.perf_counter() + share
+            worst = None
+            for unit, tail in _adversarial_inputs(sre_parse.parse(pattern, self.lexicon.re_flags)):
+                count = 1
+                while len(unit) * count <= max_length:
+                    text = unit * count + tail
+                    duration = _time_match(rx, text)
+                    throughput = len(text) / max(duration, 1e-9)
+                    if worst is None or throughput < worst.throughput:
+                        worst = RuleTiming(n, pattern, throughput, text)
+                    if time.perf_counter() > deadline:
+                        break
+                    # grow slowly once a match becomes noticeably slow
+                    count += 1 if duration > share / 50 else max(1, count // 4)
+                if time.perf_counter() > deadline:
+                    break
+            if worst:
+                timings.append(worst)
+                if worst.throughput < min_throughput:
+                    self.warning("rule #{0}: pattern {1} is slow: {2:.0f} characters "
+                        "per second on text {3}".format(n, reprlib.repr(pattern),
+                        worst.throughput, reprlib.repr(worst.text)))
+        timings.sort(key=lambda t: t.throughput)
+        return timings
 
     def validate_rule(self, rule, n):
         """Validate a rule, which should be action, target[, target, ...].
@@ -198,3 +315,259 @@ class LexiconValidator:
             else:
                 break
 
+
+# text used to find patterns that match empty text at some positions
+_SAMPLE_TEXT = "Hello, World! x_1 = [2.5e3, 'a', \"b\"]; {c: d} <e/> #f\n\t/* g */ -h ßé\n"
+
+# the characters that are considered when computing character sets
+_UNIVERSE = frozenset(map(chr, range(32, 127))) | frozenset("\t\n\r\x00\xa0ßé€")
+
+_SORTED = sorted(_UNIVERSE)
+_ORDS = [ord(c) for c in _SORTED]
+
+# the characters that are in the categories, e.g. \d
+_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: r'\d',
+    sre_constants.CATEGORY_NOT_DIGIT: r'\D',
+    sre_constants.CATEGORY_SPACE: r'\s',
+    sre_constants.CATEGORY_NOT_SPACE: r'\S',
+    sre_constants.CATEGORY_WORD: r'\w',
+    sre_constants.CATEGORY_NOT_WORD: r'\W',
+}
+_CATEGORIES = {category: frozenset(c for c in _UNIVERSE if re.match(rx, c))
+               for category, rx in _CATEGORIES.items()}
+
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+
+
+def _class_chars(items):
+    """Return the set of characters (of the universe) in the character class
+    (IN) items."""
+    negate = False
+    chars = set()
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            chars.add(chr(av))
+        elif op is sre_constants.RANGE:
+            lo, hi = av
+            chars.update(_SORTED[bisect.bisect_left(_ORDS, lo):bisect.bisect_right(_ORDS, hi)])
+        elif op is sre_constants.CATEGORY:
+            chars.update(_CATEGORIES.get(av, _UNIVERSE))
+    return _UNIVERSE - chars if negate else _UNIVERSE & chars
+
+
+def _can_be_empty(op, av):
+    """Return True if the single parsed item can match empty text."""
+    if op in _REPEATS or op is getattr(sre_constants, 'POSSESSIVE_REPEAT', None):
+        return av[0] == 0 or av[2].getwidth()[0] == 0
+    elif op is sre_constants.SUBPATTERN:
+        return av[-1].getwidth()[0] == 0
+    elif op is getattr(sre_constants, 'ATOMIC_GROUP', None):
+        return av.getwidth()[0] == 0
+    elif op is sre_constants.BRANCH:
+        return any(b.getwidth()[0] == 0 for b in av[1])
+    return op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT)
+
+
+def _first_chars(items):
+    """Return the set of characters (of the universe) a parsed sequence can start with."""
+    result = set()
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            c = chr(av)
+            result.update((c, c.lower(), c.upper()))
+        elif op is sre_constants.NOT_LITERAL:
+            result.update(_UNIVERSE - {chr(av)})
+        elif op is sre_constants.IN:
+            result.update(_class_chars(av))
+        elif op is sre_constants.BRANCH:
+            for b in av[1]:
+                result |= _first_chars(b)
+        elif op in _REPEATS or op is getattr(sre_constants, 'POSSESSIVE_REPEAT', None):
+            result |= _first_chars(av[2])
+        elif op is sre_constants.SUBPATTERN:
+            result |= _first_chars(av[-1])
+        elif op is getattr(sre_constants, 'ATOMIC_GROUP', None):
+            result |= _first_chars(av)
+        elif op not in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            result.update(_UNIVERSE)    # ANY, group references etc.
+        if not _can_be_empty(op, av):
+            break
+    return result
+
+
+def _repeat_only(items):
+    """Return True if the parsed sequence is a variable repeat, except for
+    items that can match empty text."""
+    items = list(items)
+    for i, (op, av) in enumerate(items):
+        if op in _REPEATS:
+            repeat = av[1] > 1 and av[1] != av[0]
+        elif op is sre_constants.SUBPATTERN:
+            repeat = _repeat_only(av[-1])
+        elif op is sre_constants.BRANCH:
+            repeat = any(_repeat_only(b) for b in av[1])
+        else:
+            repeat = False
+        if repeat and all(_can_be_empty(*item) for j, item in enumerate(items) if j != i):
+            return True
+    return False
+
+
+def _branches(items):
+    """Return the list of branches if the parsed sequence is one alternation."""
+    items = list(items)
+    while len(items) == 1:
+        op, av = items[0]
+        if op is sre_constants.BRANCH:
+            return av[1]
+        elif op is not sre_constants.SUBPATTERN:
+            break
+        items = list(av[-1])
+    return []
+
+
+def _always_matches(op, av):
+    """Return True if the single parsed item can't fail to match."""
+    if op in _REPEATS or op is getattr(sre_constants, 'POSSESSIVE_REPEAT', None):
+        return av[0] == 0
+    elif op is sre_constants.SUBPATTERN:
+        return all(_always_matches(*item) for item in av[-1])
+    elif op is sre_constants.BRANCH:
+        return any(all(_always_matches(*item) for item in b) for b in av[1])
+    return False
+
+
+def _tail_chars(items):
+    """Return the characters an unbounded repeat at the end of the parsed
+    sequence can consume."""
+    for op, av in reversed(list(items)):
+        if op in _REPEATS and av[1] == sre_constants.MAXREPEAT:
+            return _first_chars(av[2])
+        elif op is sre_constants.SUBPATTERN:
+            return _tail_chars(av[-1])
+        elif op not in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            break
+    return set()
+
+
+def _overlap(a, b):
+    """Return True if the parsed sequences a and b can start with the same text.
+
+    Common leading literal characters are skipped, further on only the first
+    characters are compared.
+
+    """
+    a, b = list(a), list(b)
+    while a and b and a[0][0] is b[0][0] is sre_constants.LITERAL:
+        if a[0][1] != b[0][1]:
+            return False
+        del a[0], b[0]
+    return not a or not b or bool(_first_chars(a) & _first_chars(b))
+
+
+def _backtracking_risks(items, final=True):
+    """Yield a description of every construct in the parsed pattern that can
+    cause catastrophic backtracking.
+
+    A construct is only risky if something that can fail to match follows
+    it; ``final`` is True if everything after the items always matches.
+    Possessive repeats and atomic groups are not looked into, as they do not
+    backtrack.
+
+    """
+    items = list(items)
+    for i, (op, av) in enumerate(items):
+        last = final and all(_always_matches(*item) for item in items[i+1:])
+        if op in _REPEATS:
+            lo, hi, sub = av
+            if hi == sre_constants.MAXREPEAT and not last:
+                if _repeat_only(sub):
+                    yield "nested quantifiers"
+                    continue
+                if any(_overlap(a, b) for a, b in itertools.combinations(_branches(sub), 2)):
+                    yield "overlapping alternatives in a repeat"
+                    continue
+                if _tail_chars(sub) & _first_chars(sub):
+                    yield "a repeat that can end with the characters it starts with"
+                    continue
+            yield from _backtracking_risks(sub, last)
+        elif op is sre_constants.SUBPATTERN:
+            yield from _backtracking_risks(av[-1], last)
+        elif op is sre_constants.BRANCH:
+            for b in av[1]:
+                yield from _backtracking_risks(b, last)
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            yield from _backtracking_risks(av[1])
+        elif op is sre_constants.GROUPREF_EXISTS:
+            for b in av[1:]:
+                if b:
+                    yield from _backtracking_risks(b, last)
+
+
+def _alphabet(items, result):
+    """Collect the literal strings and characters the parsed pattern expects."""
+    literal = []
+    for op, av in itertools.chain(items, [(None, None)]):
+        if op is sre_constants.LITERAL:
+            literal.append(chr(av))
+            continue
+        if len(literal) > 1:
+            result.add(''.join(literal))
+        result.update(literal)
+        literal = []
+        if op is sre_constants.IN:
+            chars = sorted(_class_chars(av))
+            result.update(chars[:1] + chars[-1:])
+        elif op is sre_constants.NOT_LITERAL:
+            result.add('a' if av != ord('a') else 'b')
+        elif op is sre_constants.ANY:
+            result.add('a')
+        elif op is sre_constants.BRANCH:
+            for b in av[1]:
+                _alphabet(b, result)
+        elif op in _REPEATS or op is getattr(sre_constants, 'POSSESSIVE_REPEAT', None):
+            _alphabet(av[2], result)
+        elif op is sre_constants.SUBPATTERN:
+            _alphabet(av[-1], result)
+        elif op is getattr(sre_constants, 'ATOMIC_GROUP', None):
+            _alphabet(av, result)
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            _alphabet(av[1], result)
+    return result
+
+
+def _time_match(rx, text):
+    """Return the time in seconds it takes to match the regular expression.
+
+    Short texts are matched repeatedly, to reduce the measuring overhead.
+
+    """
+    repeat = max(1, 1000 // len(text))
+    best = float('inf')
+    for _ in range(3 if repeat > 1 else 1):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            rx.match(text)
+        best = min(best, time.perf_counter() - t0)
+    return best / repeat
+
+
+def _adversarial_inputs(items):
+    """Yield tuples(unit, tail) for generated inputs for the parsed pattern.
+
+    The text to match is the unit repeated a number of times, followed by the
+    tail: a character that the pattern does not use, or the empty string.
+
+    """
+    alphabet = sorted(_alphabet(items, set()), key=lambda s: (len(s), s))[:20]
+    chars = set(''.join(alphabet))
+    tail = next((c for c in '\x00!~ \n' if c not in chars), '')
+    for unit in alphabet:
+        yield unit, tail
+    if len(alphabet) > 1:
+        yield ''.join(alphabet), tail
+    for unit in alphabet[:5]:
+        yield unit, ''
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Testing parce.corpus.
+"""
+
+import concurrent.futures
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, ".")
+
+import parce
+from parce.action import Comment
+from parce.corpus import Match, search
+from parce.lang.css import Css
+
+
+TEXTS = [
+    "/* a */ h1 { color: red; }\n",
+    "h2 { color: blue; } /* b */ /* c */\n",
+    "p { }\n",
+]
+
+
+def comments(q):
+    return q.all.action(Comment)
+
+
+def expected(name, text):
+    return [Match(name, n.pos, n.end, n.action, n.text)
+        for n in comments(parce.root(Css.root, text).query)]
+
+
+def test_main():
+    with tempfile.TemporaryDirectory() as directory:
+        filenames = []
+        for i, text in enumerate(TEXTS):
+            filename = os.path.join(directory, "{}.css".format(i))
+            with open(filename, "w") as f:
+                f.write(text)
+            filenames.append(filename)
+        result = sorted(search(comments, filenames))    # language is detected
+        assert result == sorted(m for f, t in zip(filenames, TEXTS) for m in expected(f, t))
+        assert result[0].action is Comment
+
+    sources = [("text{}".format(i), text) for i, text in enumerate(TEXTS * 10)]
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        # lambdas are fine when using threads
+        s = search(lambda q: q.all(Css.rule), sources, Css.root, executor=executor)
+        assert len(list(s)) == 30
+        assert all(m.action is None for m in s)
+        assert len(list(search(comments, sources, Css.root, executor=executor, limit=7))) == 7
+        assert list(search(comments, sources, Css.root, executor=executor, limit=0)) == []
+
+        # cancel the search
+        s = search(comments, sources, Css.root, executor=executor, jobs=1)
+        for count, m in enumerate(s, 1):
+            s.cancel()
+        assert s.cancelled() and count == 1
+
+    # cancel a search without matches, the pending jobs are not run
+    started = threading.Event()
+    calls = []
+    def cancelling(q):
+        calls.append(1)
+        if s.cancelled():
+            time.sleep(0.05)    # give the search the time to stop
+        s.cancel()
+        return q.all("nothing")
+    def sources():
+        yield from (("text{}".format(i), TEXTS[0]) for i in range(10))
+        started.set()   # all jobs are submitted
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        executor.submit(started.wait)
+        s = search(cancelling, sources(), Css.root, executor=executor, jobs=11)
+        assert list(s) == []
+    assert s.cancelled() and len(calls) < 10
+
+
+if __name__ == "__main__":
+    test_main()
@@ -49,5 +49,70 @@ h1[attribute="value"] + p {
         'width', 'height', 'color', 'background','text-decoration']
     assert tree.query.all.action(Name.Property.Definition)("color").next.next.pick() == "white"
 
+
+def test_style():
+    from parce.css import Element, StyleSheet
+    style = StyleSheet.from_text("""
+        * { color: black; }
+        #main { color: red; }
+        div > .a.b { color: green; }
+        p:hover { color: blue; }
+        .parce .comment { font-style: italic; }
+    """).style
+    e = Element(class_="a b", parent=Element("div", id="main"))
+    rules = style.select_element(e).rules
+    assert rules == [r for r in style.rules if e.match(r.prelude)]
+    assert len(rules) == 1
+    assert style.select_element(e).properties()['color'][0].text == "green"
+    assert len(style.candidates(Element("span"))) == 1   # only *
+    e = Element(class_="comment", parent=Element(class_="parce"))
+    assert style.select_element(e).properties()['font-style'][0].text == "italic"
+
+    # styling a whole tree at once
+    tree = Element("body")
+    for i in range(3):
+        div = Element("div", tree, id="main" if i == 1 else "x")
+        Element("p", div, class_="a b")
+        Element("p", div, class_="comment")
+    result = style.select_tree_properties(tree)
+    def elements(e):
+        yield e
+        for child in e:
+            yield from elements(child)
+    assert len(result) == 10
+    for e in elements(tree):
+        assert result[e] == style.select_element(e).properties()
+
+
+def test_file_cache():
+    import os, tempfile
+    from parce.css import FileCache, StyleSheet
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, "test.css")
+        with open(filename, "w") as f:
+            f.write("h1 { color: red; }")
+        calls = []
+        def load(data):
+            calls.append(data)
+            return StyleSheet.load_from_data(data)
+        cache = FileCache()
+        cache.directory = os.path.join(d, "cache")
+        css = cache.get(filename, load)
+        assert cache.get(filename, load) is css
+        assert len(calls) == 1
+        # another process would read the pickled structure
+        cache.invalidate(filename)
+        assert repr(cache.get(filename, load)) == repr(css)
+        assert len(calls) == 1
+        # a changed file is parsed again
+        with open(filename, "w") as f:
+            f.write("h1 { color: blue; }")
+        cache.invalidate(filename)
+        assert repr(cache.get(filename, load)) != repr(css)
+        assert len(calls) == 2
+
+
 if __name__ == "__main__":
     test_main()
+    test_style()
+    test_file_cache()
@@ -66,6 +66,31 @@ def test_main():
     # cursor still ok?
     assert c.text() == "RANDOM" + sep
 
+    # bulk replace
+    d = Document(None, "abc abc abc xyz abc")
+    c1 = Cursor(d, 4, 7)
+    c2 = Cursor(d, 17)
+    d.replace("abc", "XY")
+    assert d.text() == "XY XY XY xyz XY"
+    assert d.changed_ranges() == [(0, 3, 2), (3, 3, 2), (6, 3, 2), (13, 3, 2)]
+    assert c1.text() == "XY"
+    assert c2.pos == 13
+    d.re_sub(r'X(Y)', r'\1\1', 3)
+    assert d.text() == "XY YY YY xyz YY"
+    assert d.changed_ranges() == [(3, 2, 2), (6, 2, 2), (13, 2, 2)]
+
+    # multiple disjoint changes are retokenized separately
+    from parce.lang.json import Json
+    from parce.treebuilder import build_tree, TreeBuilder
+    def dump(tree):
+        return [(t.pos, t.text, t.action, t.parent.lexicon) for t in tree.tokens()]
+    d = Document(Json.root, '{"a": [1, 2, {"b": "c"}], "d": "e"}\n' * 20, TreeBuilder())
+    d.bulk_replace([(2, 3, "x"), (700, 701, "y"), (701, 702, "[")])
+    assert dump(d.get_root()) == dump(build_tree(Json.root, d.text()))
+    d.replace('"e"', '"f, "')
+    assert dump(d.get_root()) == dump(build_tree(Json.root, d.text()))
+    assert d.changed_ranges()[-1] == (len(d.text()) - 7, 3, 5)
+
 
 if __name__ == "__main__":
     test_main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Testing parce.formatter.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, ".")
+
+from parce import Document, theme_by_name
+from parce.formatter import ActionTable, Formatter, FormatRangeCache
+from parce.introspect import standardactions
+from parce.lang.css import Css
+from parce.treebuilder import TreeBuilder
+
+
+def test_main():
+    filename = os.path.join(os.path.dirname(__file__), '../parce/themes/default.css')
+    text = open(filename).read()
+    d = Document(Css.root, text, TreeBuilder())
+    f = Formatter(theme_by_name('default'))
+    f.add_theme(Css, theme_by_name('dark'))
+
+    c = FormatRangeCache(f, d.builder())
+    c.chunk_size = 200
+
+    def check(start, end):
+        assert list(c.format_ranges(start, end)) == \
+            list(f.format_ranges(d.get_root(True), start, end))
+
+    check(0, None)
+    misses = c.misses
+    check(500, 1500)
+    assert c.misses == misses
+
+    # only the damaged chunks are formatted again
+    with d:
+        d[1000:1010] = "/* comment */"
+        d[2000:2000] = "h1 { color: red; }"
+    check(0, None)
+    assert c.misses - misses < len(text) // 200
+    check(1200, len(d.text()) + 10)
+
+    # compiled action tables give the same result
+    f2 = Formatter(theme_by_name('default'))
+    f2.add_theme(Css, theme_by_name('dark'))
+    f2.compile(Css)
+    table = f2.format_caches()[Css].textformat
+    assert isinstance(table, ActionTable)
+    assert all(table[a._id] is not ActionTable.unresolved
+        for a in standardactions(Css))
+    tree = d.get_root(True)
+    assert list(f2.format_ranges(tree)) == list(f.format_ranges(tree))
+
+
+def test_cache_baseformat():
+    from parce.lang.html import Html
+    from parce.lang.javascript import JavaScript
+    text = ("<html><body>\n<script>\n  var x = 1;\n\n  function f(a) { return a + 2; }\n"
+            "</script>\n<p>Hello   world</p>\n") * 10
+    d = Document(Html.root, text, TreeBuilder())
+    f = Formatter(theme_by_name('default'))
+    f.add_theme(JavaScript, theme_by_name('dark'), True)
+    for size in 7, 50, 333:
+        c = FormatRangeCache(f, d.builder())
+        c.chunk_size = size
+        # the text between tokens gets the format of the theme of the next
+        # token, also at the chunk boundaries; and at the end of the range,
+        # that of the previous token
+        for start, end in (0, None), (25, 300), (99, 101), (0, 118), (10, 1000):
+            assert list(c.format_ranges(start, end)) == \
+                list(f.format_ranges(d.get_root(True), start, end))
+
+
+if __name__ == "__main__":
+    test_main()
+    test_cache_baseformat()
@@ -43,6 +43,8 @@ h1 {
     color: red;
 }
 """)
+    # blank lines get the indent too
+    yield (Css.root, "h1 {\n\ncolor: red;\n}\n", "h1 {\n    \n    color: red;\n}\n")
 
 
 def test_main():
@@ -55,5 +57,35 @@ def test_main():
         assert d.text() == indented
 
 
+def test_cached_states():
+    from parce.lang.css import Css
+    text = "h1 {\ncolor: red;\n}\n" * 20
+    d1 = Document(Css.root, text)
+    d2 = Document(Css.root, text)
+    i = Indenter()
+    for pos, insert in (30, None), (len(text) - 10, None), (5, "h2 {\n"), (20, None):
+        if insert:
+            d1.insert(pos, insert)
+            d2.insert(pos, insert)
+        else:
+            # the indenter with cached states behaves like a new one
+            i.indent(Cursor(d1, pos, pos + 30))
+            Indenter().indent(Cursor(d2, pos, pos + 30))
+            assert d1.text() == d2.text()
+    assert d1.text() != text
+
+
+def test_block_tokens():
+    from parce.lang.python import Python
+    text = "def f(x):\n\n    s = '''a\n\n    b'''\n    return [1,\n2]\n"
+    d = Document(Python.root, text)
+    tokens = list(d.get_root(True).tokens())
+    for block, block_tokens in Indenter().block_tokens(d):
+        assert block_tokens == tuple(t for t in tokens
+            if t.pos < block.end and t.end > block.pos)
+
+
 if __name__ == "__main__":
     test_main()
+    test_cached_states()
+    test_block_tokens()
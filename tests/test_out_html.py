@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Testing parce.out.html.
+"""
+
+import io
+import sys
+
+sys.path.insert(0, ".")
+
+from parce import Cursor, Document, theme_by_name
+from parce.lang.css import Css
+from parce.out.html import HtmlFormatter, SimpleHtmlFormatter
+
+
+def test_main():
+    d = Document(Css.root, "/* a\nb */\nh1 { color: red; }\n" * 5)
+    c = Cursor(d, 0, None)
+    for f in HtmlFormatter(theme_by_name()), SimpleHtmlFormatter():
+        # streaming output equals the string output
+        out = io.StringIO()
+        f.write_html(c, out, full=True, buffer_size=10)
+        assert out.getvalue() == f.full_html(c)
+        out = io.BytesIO()
+        f.write_html(c, out, buffer_size=7)
+        assert out.getvalue().decode() == f.html(c)
+
+    # a text stream that is not an io.TextIOBase gets text
+    class Writer:
+        def __init__(self):
+            self.parts = []
+        def write(self, text):
+            self.parts.append(text)
+    out = Writer()
+    f.write_html(c, out, buffer_size=7)
+    assert "".join(out.parts) == f.html(c)
+    out = Writer()
+    f.write_html(c, out, binary=True)
+    assert b"".join(out.parts).decode() == f.html(c)
+
+    # line numbers and anchors
+    f = SimpleHtmlFormatter()
+    out = io.StringIO()
+    f.write_html(Cursor(d, 27, 38), out, line_numbers=True, anchor="line")
+    assert out.getvalue().split('\n') == [
+        '<a id="line-3"></a><span class="lineno">3</span> '
+            '<span class="delimiter bracket">}</span>',
+        '<a id="line-4"></a><span class="lineno">4</span> '
+            '<span class="comment">/* a</span>',
+        '<a id="line-5"></a><span class="lineno">5</span> '
+            '<span class="comment">b */</span>',
+    ]
+
+
+if __name__ == "__main__":
+    test_main()
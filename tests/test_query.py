@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Testing parce.query.
+"""
+
+import sys
+
+sys.path.insert(0, ".")
+
+import parce
+from parce.action import Comment, Delimiter, Name
+from parce.lang.css import Css
+from parce.query import Query, TreeIndex, compile_query
+
+
+TEXT = """
+/* comment */
+h1 { color: red; }
+@media print {
+    h1, h2 { color: black; }   /* print */
+}
+"""
+
+
+def queries(root):
+    """Yield the results of some queries on the tree."""
+    yield root.query.all.action(Comment).list()
+    yield root.query.all.action(Name.Tag, Delimiter).list()
+    yield root.query.all("h1", Css.rule).list()
+    yield root.query.all.is_not.action(Comment).list()
+    yield root.query.children.all(Css.declaration).list()
+    yield root[2].query.all("h1").list()
+
+
+def test_main():
+    root = parce.root(Css.root, TEXT)
+    assert root.query.all(Css.rule).count() == 2
+    assert root.query.all("h1").count() == 2
+
+
+def test_index():
+    d = parce.Document(Css.root, TEXT)
+    root = d.get_root(True)
+    results = list(queries(root))
+    index = TreeIndex(root)
+    index.connect_treebuilder(d.builder())
+    assert TreeIndex.get(root[0]) is index
+    assert list(queries(root)) == results
+
+    # the index is rebuilt after a change
+    d.insert(0, "h1 { color: blue; } /* new */")
+    assert root.query.all.action(Comment).count() == 9
+    assert root.query.all("h1").count() == 3
+    results = list(queries(root))
+    index.disconnect_treebuilder(d.builder())
+    del index
+    assert TreeIndex.get(root) is None
+    assert list(queries(root)) == results
+
+
+def test_compile():
+    root = parce.root(Css.root, TEXT)
+    chains = [
+        lambda q: q.all.action(Name.Tag)("h1").next,
+        lambda q: q.all(Css.rule).children.is_not.tokens,
+        lambda q: q.all.in_range(20, 60).containing("o"),
+        lambda q: q.all.is_not.in_range(20, 60).contexts.len(2, 4),
+        lambda q: q.children[-1][1:].all.tokens.uniq.slice(3).parent,
+        lambda q: q.allcontexts.first.right.is_not.startingwith("c"),
+    ]
+    for chain in chains:
+        compiled = compile_query(chain)
+        assert compiled is compile_query(chain)
+        assert compiled(root).list() == chain(root.query).list()
+        assert compiled(*root).list() == chain(Query.from_nodes(root)).list()
+
+    # a new filter function every time, the cache stays bounded
+    for i in range(parce.query.COMPILED_QUERIES_MAXSIZE + 10):
+        compile_query(lambda q: q.all.filter(lambda n: n.pos > i))
+    assert len(parce.query._compiled_queries) == parce.query.COMPILED_QUERIES_MAXSIZE
+
+
+def test_query_range():
+    root = parce.root(Css.root, TEXT * 20)
+    for start, end in (0, None), (0, 1), (15, 16), (30, 200), (700, 750), (2000, 3000):
+        overlapping = [n for n in root.query.all
+            if n.end > start and (end is None or n.pos < end)]
+        assert root.query_range(start, end).list() == overlapping
+    assert root.query_range(30, 200).action(Comment).list() == \
+        [n for n in root.query.all.action(Comment) if n.end > 30 and n.pos < 200]
+
+
+if __name__ == "__main__":
+    test_main()
+    test_index()
+    test_compile()
+    test_query_range()
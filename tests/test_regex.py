@@ -26,7 +26,11 @@ Test the regex module.
 import sys
 sys.path.insert(0, '.')
 
+import random
 import re
+import string
+import tempfile
+import time
 
 from parce.regex import *
 from parce.lang import lilypond_words
@@ -62,6 +66,65 @@ def test_main():
         assert bool(to_string(expr)) is result
 
 
+def test_words_cache():
+    words = ['car', 'cdr', 'caar', 'cadr', 'cdar', 'cddr']
+    with tempfile.TemporaryDirectory() as directory:
+        built = []
+        def build(words):
+            built.append(words)
+            return words2regexp(words)
+        for _ in range(2):
+            # another process would use a new cache with the same directory
+            cache = WordsCache()
+            cache.directory = directory
+            assert cache.get(tuple(words), build) == 'c[ad]{1,2}r'
+            assert cache.get(tuple(words), build) == 'c[ad]{1,2}r'
+            assert cache.hits == 1 and cache.misses == 1
+        assert len(built) == 1
+    assert words2regexp(iter(words)) is words2regexp(words)
+    assert words_cache.time > 0
+
+    # the order of the words and duplicates don't matter
+    cache = WordsCache(2)
+    assert cache.get(words, words2regexp) == cache.get(reversed(words + words), words2regexp)
+    assert cache.hits == 1 and cache.misses == 1
+    # the least recently used expressions are discarded
+    cache.get(['a'], words2regexp)
+    cache.get(words, words2regexp)
+    cache.get(['b'], words2regexp)
+    assert len(cache._exprs) == 2 and cache.hits == 2
+    cache.get(words, words2regexp)
+    assert cache.hits == 3
+
+
+def word_list(count, seed=0):
+    """Return a list of random words."""
+    r = random.Random(seed)
+    return list(set(''.join(r.choice(string.ascii_lowercase[:12])
+        for _ in range(r.randint(3, 12))) for _ in range(count)))
+
+
+def test_large_word_lists():
+    check_word_list(word_list(20000))
+    # very long words and deep tries don't hit the recursion limit
+    check_word_list(["x" * i + "y" for i in range(1, 3000)])
+    check_word_list(["{:04}".format(i) + "abc" * 500 + str(i % 7) for i in range(500)])
+
+
+def benchmark():
+    """Print the time needed to build expressions for growing word lists."""
+    for count in 10000, 20000, 40000, 80000, 160000:
+        words = word_list(count, count)
+        words_cache.clear()
+        t = time.perf_counter()
+        words2regexp(words)
+        print("{:6} words, {:7} characters: {:.2f} sec".format(
+            count, sum(map(len, words)), time.perf_counter() - t))
+
+
 if __name__ == "__main__":
     test_main()
+    test_words_cache()
+    test_large_word_lists()
+    benchmark()
 
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Testing parce.registry.
+"""
+
+import collections
+import fnmatch
+import re
+import sys
+
+sys.path.insert(0, ".")
+
+import parce
+from parce.registry import Registry, import_times, registry, root_lexicon
+
+
+def suggest(reg, filename=None, mimetype=None, contents=None):
+    """Straightforward implementation of Registry.suggest() to compare with."""
+    weights = collections.defaultdict(int)
+    if filename:
+        for name in reg:
+            weight = max((w for pat, w in reg[name].filenames
+                           if fnmatch.fnmatch(filename, pat)), default=0)
+            if weight:
+                weights[name] += weight
+    if mimetype:
+        for name in reg:
+            weight = max((w for mtype, w in reg[name].mimetypes
+                           if mtype == mimetype), default=0)
+            if weight:
+                weights[name] += weight
+    if weights:
+        names = sorted(weights, key=weights.get, reverse=True)
+        if len(names) == 1 or weights[names[0]] > weights[names[1]]:
+            return names
+    else:
+        names = reg.keys()
+    if contents:
+        contents = contents[:5000]
+        for name in names:
+            weight = sum(w for regex, w in reg[name].guesses
+                           if re.search(regex, contents))
+            if weight:
+                weights[name] += weight
+    return sorted(weights, key=weights.get, reverse=True)
+
+
+FILENAMES = [
+    None, "a.css", "x.tar.css", "/home/me/a.b/style.css", "a.c", "a.hpp",
+    "a.xml", "a.html", "a.tex", "doc.1", "doc.9", "Makefile", ".css", "css",
+    "a.CSS", "a.txt",
+]
+
+MIMETYPES = [None, "text/html", "text/plain", "application/sgml", "text/x-c"]
+
+CONTENTS = [
+    None, "", "<!DOCTYPE html><html>", "#!/bin/sh\n", "\\version \"2.20\"",
+    "body { color: red }", '{"key": 1}', ">>> import os",
+]
+
+
+def test_main():
+    queries = [(f, m, c) for f in FILENAMES for m in MIMETYPES for c in CONTENTS]
+    assert registry.suggest_many(queries) == [suggest(registry, *q) for q in queries]
+    assert registry.suggest_many(FILENAMES[1:]) == [suggest(registry, f) for f in FILENAMES[1:]]
+
+    # the index is updated when the registry changes
+    reg = Registry(registry)
+    assert reg.suggest("a.foo") == []
+    reg.register("my.lang.Foo.root", name="Foo", desc="Foo",
+        filenames=[("*.foo", 1), ("*.f[o0]o", .5)], mimetypes=[("text/html", 1)])
+    assert reg.suggest("a.foo") == ["my.lang.Foo.root"]
+    assert reg.suggest("a.f0o", "text/html") == suggest(reg, "a.f0o", "text/html")
+    del reg["my.lang.Foo.root"]
+    assert reg.suggest("a.foo") == []
+
+
+def test_lazy():
+    lexicon = root_lexicon("tests.calc.Calculator.root", lazy=True)
+    assert repr(lexicon) == "Calculator.root" and not lexicon.is_loaded()
+    for l in lexicon, lexicon.lexicon():
+        tree = parce.root(l, "1 + 2")
+        assert tree.lexicon is lexicon.lexicon()
+        assert lexicon == tree.lexicon and tree.query.all.tokens.count() == 3
+    d = parce.Document(lexicon, "1 * 2")
+    assert d.root_lexicon() is lexicon.lexicon()
+    d.set_root_lexicon(parce.find("json", lazy=True))
+    assert d.root_lexicon() is parce.find("json")
+    assert all(t > 0 for t in import_times().values())
+
+    # copying and pickling
+    import copy, pickle
+    from parce.lexicon import LazyLexicon
+    lexicon = parce.find("json", lazy=True)
+    for c in copy.copy(lexicon), copy.deepcopy(lexicon), pickle.loads(pickle.dumps(lexicon)):
+        assert type(c) is LazyLexicon
+        assert c.qualname == lexicon.qualname and c.lexicon() is lexicon.lexicon()
+
+
+if __name__ == "__main__":
+    test_main()
+    test_lazy()
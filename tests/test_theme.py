@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Testing parce.theme.
+"""
+import sys
+
+sys.path.insert(0, ".")
+
+from parce import theme_by_name
+from parce.themes import get_all_themes
+from parce.introspect import standardactions
+from parce.lang.css import Css
+from parce.lang.html import Html
+
+
+def test_main():
+    theme = theme_by_name()
+    formats = theme.resolve_all([Html])
+    # actions of referred languages are also resolved
+    assert standardactions(Css) <= set(formats)
+    for name in get_all_themes():
+        theme = theme_by_name(name)
+        formats = theme.resolve_all([Html])
+        for action, textformat in formats.items():
+            assert textformat == theme.textformat(action)
+    try:
+        formats[None] = None
+    except TypeError:
+        pass
+    else:
+        assert False, "resolve_all() must return a read-only mapping"
+
+
+if __name__ == "__main__":
+    test_main()
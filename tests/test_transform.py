@@ -55,6 +55,189 @@ def test_main():
     assert result == JSON_RESULT
 
 
+def test_incremental():
+    from parce.lang.json import Json
+    from parce.treebuilder import TreeBuilder
+    text = open('tests/lang/example.json').read()
+    d = parce.Document(Json.root, text, TreeBuilder())
+    t = parce.transform.Transformer()
+    t.connect_treebuilder(d.builder())
+    changes = []
+    t.connect("changed", lambda tree, c: changes.extend(c))
+    t.build(d.get_root())
+    assert t.result(d.get_root()) == JSON_RESULT
+    assert not changes
+
+    pos = text.index('Frescobaldi"')
+    d[pos:pos+3] = "XYZ"
+    result = t.result(d.get_root())
+    assert result['title'] == 'XYZscobaldi'
+    assert result == parce.transform.transform_tree(d.get_root())
+    # children come before their parents, the root is the last
+    assert [c.context.lexicon for c in changes[-3:]] == [Json.value, Json.object, Json.root]
+    assert changes[-1].old == JSON_RESULT and changes[-1].new is result
+
+    # nothing invalidated: the cached result is returned
+    assert t.update_tree(d.get_root()) == (result, [])
+
+    # only the invalidated contexts are transformed again, and the items of
+    # the other contexts are reused
+    calls = []
+    class CountingTransform(parce.lang.json.JsonTransform):
+        def object(self, items):
+            calls.append(len(items))
+            return super().object(items)
+    text = "[" + ", ".join('{"a": %d}' % i for i in range(100)) + "]"
+    d = parce.Document(Json.root, text, TreeBuilder())
+    t = parce.transform.Transformer()
+    t.add_transform(Json, CountingTransform())
+    t.connect_treebuilder(d.builder())
+    t.build(d.get_root())
+    assert len(calls) == 100
+    old = t.result(d.get_root())
+    pos = text.index('50}')
+    d[pos:pos+2] = "-3"
+    result = t.result(d.get_root())
+    assert len(calls) == 101
+    assert result[50] == {"a": -3}
+    assert result[:50] == old[:50] and result[51:] == old[51:]
+    assert all(a is b for a, b in zip(result[:50], old[:50]))
+
+
+def test_parallel():
+    import concurrent.futures
+    from parce.lang.json import Json
+    text = "[" + ", ".join(open('tests/lang/example.json').read() for i in range(20)) + "]"
+    tree = parce.root(Json.root, text)
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        t = parce.transform.Transformer()
+        assert t.transform_tree_parallel(tree, executor, 2) == [JSON_RESULT] * 20
+        # the state of the workers is merged, and can be used incrementally
+        assert list(t._interrupt) == [tree]
+        assert all(n in t._items for n in tree.query.all.contexts)
+
+        from parce.treebuilder import TreeBuilder
+        d = parce.Document(Json.root, text, TreeBuilder())
+        t = parce.transform.Transformer()
+        t.transform_tree_parallel(d.get_root(), executor, 2)
+        t.connect_treebuilder(d.builder())
+        pos = text.index('Frescobaldi"')
+        d[pos:pos+3] = "XYZ"
+        result = t.result(d.get_root())
+        assert result[0]['title'] == 'XYZscobaldi' and result[1:] == [JSON_RESULT] * 19
+
+    # the compact form used for process pools
+    data, languages = parce.transform._compact_tree(tree)
+    assert languages == {Json}
+    copy = parce.transform._restore_tree(data)
+    assert [(t.pos, t.text, t.action) for t in copy.tokens()] == \
+           [(t.pos, t.text, t.action) for t in tree.tokens()]
+
+
+def test_stream():
+    from parce.lang.json import Json
+    text = "[" + ", ".join(open('tests/lang/example.json').read() for i in range(20)) + "]"
+    t = parce.transform.Transformer()
+    values = t.get_transform(Json).values
+    for size in 1, 17, 1000:
+        chunks = (text[i:i+size] for i in range(0, len(text), size))
+        assert list(values(t.transform_text_stream(Json.root, chunks, 2, 64))) == [JSON_RESULT] * 20
+    assert list(t.transform_text_stream(Json.root, [text], 0)) == \
+        [parce.transform.Item("root", [JSON_RESULT] * 20)]
+
+    # tokens are yielded as well, in order
+    text = '[1, 2, "x", {"a": 1}, [3], true, -4.5]'
+    items = list(t.transform_text_stream(Json.root, (c for c in text), 2, 4))
+    assert list(values(items)) == [1, 2, "x", {"a": 1}, [3], True, -4.5]
+    array = parce.root(Json.root, text)[1]
+    assert [(i.pos, i.text) for i in items if i.is_token] == \
+        [(n.pos, n.text) for n in array if n.is_token]
+
+
+def test_shared_cache():
+    from parce.lang.json import Json
+    example = open('tests/lang/example.json').read()
+    cache = parce.transform.ResultCache()
+    results = []
+    for text in "[{0}, 1]", "[2, {0}]":
+        t = parce.transform.Transformer()
+        t.shared_cache = cache
+        results.append(t.transform_tree(parce.root(Json.root, text.format(example))))
+    # the identical fragment was transformed only once
+    assert results[0][0] is results[1][1]
+    assert cache.hits
+
+    # different Transforms don't share results
+    class UpperTransform(parce.lang.json.JsonTransform):
+        def string(self, items):
+            return super().string(items).upper()
+    cache = parce.transform.ResultCache()
+    t1, t2 = parce.transform.Transformer(), parce.transform.Transformer()
+    t2.add_transform(Json, UpperTransform())
+    t1.shared_cache = t2.shared_cache = cache
+    assert t1.transform_tree(parce.root(Json.root, '["x"]')) == ['x']
+    assert t2.transform_tree(parce.root(Json.root, '["x"]')) == ['X']
+    assert t1.transform_tree(parce.root(Json.root, '["x"]')) == ['x']
+
+    # incremental updates with results from the shared cache
+    import random
+    from parce.treebuilder import TreeBuilder
+    rnd = random.Random(1)
+    d = parce.Document(Json.root, "[" + ", ".join([example] * 5) + "]", TreeBuilder())
+    t = parce.transform.Transformer()
+    t.shared_cache = parce.transform.ResultCache(50)
+    t.connect_treebuilder(d.builder())
+    t.build(d.get_root())
+    for i in range(100):
+        pos = rnd.randrange(len(d.text()))
+        end = min(len(d.text()), pos + rnd.randrange(6))
+        d[pos:end] = rnd.choice(("", "1", '"a"', ", 3", "{", "}", "[2]", '"k": 4,', " "))
+        assert t.result(d.get_root()) == parce.transform.transform_tree(d.get_root())
+
+    cache = parce.transform.ResultCache(2)
+    for i in range(5):
+        cache.set(i, i)
+    assert cache.get(3) == 3 and cache.get(1) is None
+    cache.set(5, 5)
+    assert len(cache) == 2 and cache.get(3) == 3 and cache.get(4) is None
+
+
+def test_background():
+    import asyncio
+    import concurrent.futures
+    import threading
+    from parce.lang.json import Json
+
+    # a job waiting for a busy executor is reused
+    event = threading.Event()
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        executor.submit(event.wait)
+        t = parce.transform.BackgroundTransformer(executor)
+        tree = parce.root(Json.root, "[1, 2]")
+        future = t.build(tree)
+        assert t.build(tree) is future
+        assert t.busy(tree) and not t.wait(tree, 0.01)
+        event.set()
+        assert future.result() == [1, 2]
+        assert t.wait(tree) and not t.busy(tree)
+        loop = asyncio.new_event_loop()
+        assert loop.run_until_complete(t.wait_async(tree)) == [1, 2]
+        loop.close()
+
+        # connected to a document
+        d = parce.Document(Json.root, "[1, 2]")
+        t.connect_treebuilder(d.builder())
+        for i in range(10):
+            d.insert(1, "{}, ".format(i))
+        t.wait(d.get_root())
+        assert t.result(d.get_root()) == [9, 8, 7, 6, 5, 4, 3, 2, 1, 0, 1, 2]
+
+
 if __name__ == "__main__":
     test_main()
+    test_incremental()
+    test_parallel()
+    test_stream()
+    test_shared_cache()
+    test_background()
 
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Test the backtracking and performance checks of parce.validate.
+"""
+
+import sys
+sys.path.insert(0, '.')
+
+from parce import Language, lexicon
+from parce.action import Name, Text
+from parce.validate import LexiconValidator
+
+
+class MyLang(Language):
+    @lexicon
+    def risky(cls):
+        yield r"(a+)+b", Text                       # 1 nested quantifiers
+        yield r'"(?:\\.|[^"])*"', Text              # 2 overlapping alternatives
+        yield r"\w+(?:[._]\w+)*@", Text             # 3 repeat boundaries
+        yield r"=(?:\w+\s*)*", Text                 # 4 fine, nothing can fail after it
+        yield r'"(?:[^"\\]|\\.)*"', Text            # 5 fine
+        yield r"\w+(?:\.\w+)*@", Text               # 6 fine
+        yield r"[a-z]+(?:-[a-z]+)*;", Text          # 7 fine
+
+    @lexicon
+    def empty(cls):
+        yield r"\b", Text                           # 1 empty match without target
+        yield r"(?=x)", Name, cls.risky             # 2 fine, has a target
+        yield r"\w+", Text                          # 3 fine
+
+    @lexicon
+    def slow(cls):
+        yield r"(a+)+b", Text
+        yield r"\w+", Text
+
+
+def rules(warnings):
+    """Return the set of rule numbers that have a warning."""
+    return {int(w.split('#')[1].split(':')[0]) for w in warnings}
+
+
+def test_backtracking():
+    v = LexiconValidator(MyLang.risky)
+    assert v.validate()
+    assert rules(v.warnings) == {1, 2, 3}
+
+
+def test_empty_match():
+    v = LexiconValidator(MyLang.empty)
+    assert v.validate()
+    assert rules(v.warnings) == {1}
+
+
+def test_check_performance():
+    v = LexiconValidator(MyLang.slow)
+    timings = v.check_performance(0.5)
+    assert [t.rule for t in timings] == [1, 2]
+    assert timings[0].throughput < 100000 < timings[1].throughput
+    assert any("slow" in w for w in v.warnings)
+
+
+if __name__ == "__main__":
+    test_backtracking()
+    test_empty_match()
+    test_check_performance()